@@ -18,14 +18,19 @@ Usage:
 import asyncio
 import atexit
 import fcntl
+import importlib
 import logging
 import os
+import queue
 import signal
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Callable
 
-# Add the src directory to path for absolute imports
-sys.path.insert(0, str(Path(__file__).parent))
+# Modules are imported absolutely from src/ (e.g. `from config import config`).
+# Running `python src/bot.py` already puts this directory first on sys.path.
 
 
 # =============================================================================
@@ -92,7 +97,68 @@ class SingleInstance:
 # Global instance lock
 _instance_lock = SingleInstance()
 
+
+# =============================================================================
+# BUFFERED LOG FILE - Batches log writes instead of flushing every record
+# =============================================================================
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that writes through a large buffer.
+
+    Records are flushed immediately at WARNING and above; everything else is
+    flushed once flush_interval seconds have passed since the last flush.
+    File size is tracked in-process so the rollover check doesn't have to
+    seek (which would flush the buffer on every record).
+    """
+
+    def __init__(self, *args, buffer_size: int = 64 * 1024,
+                 flush_interval: float = 30.0, **kwargs):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._stream_size = 0
+        self._last_flush = time.monotonic()
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        stream = open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors
+        )
+        self._stream_size = os.fstat(stream.fileno()).st_size
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            if (self.maxBytes > 0 and self._stream_size
+                    and self._stream_size + len(msg) >= self.maxBytes):
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+
+            self.stream.write(msg)
+            self._stream_size += len(msg)
+
+            if (record.levelno >= logging.WARNING
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        super().flush()
+        self._last_flush = time.monotonic()
+
+
 from telegram import Update
+from telegram.request import HTTPXRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -100,8 +166,6 @@ from telegram.ext import (
     filters,
 )
 
-from logging.handlers import RotatingFileHandler
-
 from config import config
 from db import db
 from monitoring.alerting import alert_manager
@@ -111,151 +175,231 @@ from memory import (
     memory_manager, server_logger, proactive_agent, conversation_analyzer
 )
 from memory.seed_data import check_and_load_seed_data
-from handlers.commands import (
-    cmd_help, cmd_ping, cmd_status, cmd_gpu, cmd_disk,
-    cmd_memory, cmd_cpu, cmd_uptime, cmd_processes, cmd_ip,
-    cmd_services, cmd_start_service, cmd_stop_service, cmd_restart_service, cmd_logs,
-    cmd_docker, cmd_monitoring, cmd_conda, cmd_ollama, cmd_llm,
-    cmd_confirm, cmd_reboot, cmd_shutdown, cmd_kill, cmd_stats,
-    cmd_history, cmd_alert, cmd_screenshot, cmd_chart, cmd_schedule
-)
-from handlers.memory_cmd import (
-    cmd_memory_view, cmd_memory_add, cmd_memory_del,
-    cmd_server_log, cmd_proactive, cmd_insights
-)
 from monitoring.scheduler import scheduler
-from handlers.claude import handle_claude_command
-from handlers.llm import handle_message
 from handlers.email import email_conversation_handler
-from handlers.keyboard import callback_handler, cmd_menu
-from handlers.files import cmd_download, cmd_ls, cmd_cat, file_upload_handler
+from handlers.keyboard import callback_handler
+from handlers.files import file_upload_handler
 from utils.watchdog import watchdog
+from utils.rate_limiter import ChatRateLimiter
 
 # Configure logging with rotation
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_DIR = Path(__file__).parent.parent / 'logs'
-LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / 'bot.log'
 LOG_MAX_BYTES = 5 * 1024 * 1024  # 5 MB per file
 LOG_BACKUP_COUNT = 3  # Keep 3 backup files
+LOG_BUFFER_SIZE = 64 * 1024  # Buffer up to 64 KB between flushes
+LOG_FLUSH_INTERVAL = 30  # Flush buffered records at least every 30s
 
-# Set up root logger
-logging.basicConfig(
-    format=LOG_FORMAT,
-    level=logging.INFO
-)
+# Installed by _setup_logging() from main()
+file_handler: BufferedRotatingFileHandler | None = None
+log_listener: QueueListener | None = None
+
+
+def _setup_logging() -> None:
+    """
+    Install the root logging handlers.
+
+    The root logger only enqueues records; a background listener thread owns
+    the file/stream handlers so disk writes never block the event loop.
+    Under systemd (INVOCATION_ID set) stdout is already captured, so the
+    stream handler is skipped to avoid writing every record twice.
+    """
+    global file_handler, log_listener
+
+    LOG_DIR.mkdir(exist_ok=True)
+    log_formatter = logging.Formatter(LOG_FORMAT)
+
+    file_handler = BufferedRotatingFileHandler(
+        LOG_FILE,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        buffer_size=LOG_BUFFER_SIZE,
+        flush_interval=LOG_FLUSH_INTERVAL
+    )
+    file_handler.setFormatter(log_formatter)
+    handlers = [file_handler]
+
+    if not os.environ.get("INVOCATION_ID"):
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(log_formatter)
+        handlers.append(stream_handler)
+
+    log_queue = queue.SimpleQueue()
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[QueueHandler(log_queue)],
+        force=True
+    )
+    log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
 
-# Add rotating file handler
-file_handler = RotatingFileHandler(
-    LOG_FILE,
-    maxBytes=LOG_MAX_BYTES,
-    backupCount=LOG_BACKUP_COUNT,
-    encoding='utf-8'
-)
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-logging.getLogger().addHandler(file_handler)
 
 logger = logging.getLogger(__name__)
 
 
-def setup_handlers(app: Application) -> None:
-    """Register all command and message handlers"""
+def _schedule_log_flush(loop: asyncio.AbstractEventLoop) -> None:
+    """Periodically flush the log buffer so idle periods still reach disk"""
+    loop.run_in_executor(None, file_handler.flush)
+    loop.call_later(LOG_FLUSH_INTERVAL, _schedule_log_flush, loop)
+
+
+# Handler callbacks resolved on first dispatch, keyed by (module, attribute)
+_resolved_handlers: dict[tuple[str, str], Callable] = {}
+
+
+def lazy(modpath: str, attr: str) -> Callable:
+    """
+    Wrap a handler callback so its module is only imported on first use.
+
+    Keeps the LLM clients, chart tooling and Claude integration out of
+    startup until a command that needs them actually arrives.
+    """
+    key = (modpath, attr)
 
+    async def _handler(update: Update, context) -> None:
+        func = _resolved_handlers.get(key)
+        if func is None:
+            func = getattr(importlib.import_module(modpath), attr)
+            _resolved_handlers[key] = func
+        return await func(update, context)
+
+    _handler.__name__ = _handler.__qualname__ = attr
+    return _handler
+
+
+# Lazily-routed modules loaded in the background once the bot is up
+WARM_IMPORTS = ("handlers.commands", "handlers.files", "handlers.claude", "tools.screenshot")
+
+
+def _warm_imports() -> None:
+    """Import handler modules and chart libraries so first use doesn't stall"""
+    for modpath in WARM_IMPORTS:
+        try:
+            importlib.import_module(modpath)
+        except Exception as e:
+            logger.warning(f"Pre-import of {modpath} failed: {e}")
+
+    from tools.screenshot import preload_chart_libs
+    preload_chart_libs()
+
+
+# Command table: (command names incl. aliases, callback)
+COMMANDS: tuple[tuple[tuple[str, ...], Callable], ...] = (
     # Help and status
-    app.add_handler(CommandHandler("help", cmd_help))
-    app.add_handler(CommandHandler("start", cmd_help))  # Telegram start
-    app.add_handler(CommandHandler("ping", cmd_ping))
-    app.add_handler(CommandHandler("status", cmd_status))
+    (("help", "start"), lazy("handlers.commands", "cmd_help")),
+    (("ping",), lazy("handlers.commands", "cmd_ping")),
+    (("status",), lazy("handlers.commands", "cmd_status")),
 
     # System info
-    app.add_handler(CommandHandler("gpu", cmd_gpu))
-    app.add_handler(CommandHandler("disk", cmd_disk))
-    app.add_handler(CommandHandler("memory", cmd_memory))
-    app.add_handler(CommandHandler("ram", cmd_memory))  # Alias
-    app.add_handler(CommandHandler("cpu", cmd_cpu))
-    app.add_handler(CommandHandler("uptime", cmd_uptime))
-    app.add_handler(CommandHandler("processes", cmd_processes))
-    app.add_handler(CommandHandler("ps", cmd_processes))  # Alias
-    app.add_handler(CommandHandler("ip", cmd_ip))
+    (("gpu",), lazy("handlers.commands", "cmd_gpu")),
+    (("disk",), lazy("handlers.commands", "cmd_disk")),
+    (("memory", "ram"), lazy("handlers.commands", "cmd_memory")),
+    (("cpu",), lazy("handlers.commands", "cmd_cpu")),
+    (("uptime",), lazy("handlers.commands", "cmd_uptime")),
+    (("processes", "ps"), lazy("handlers.commands", "cmd_processes")),
+    (("ip",), lazy("handlers.commands", "cmd_ip")),
 
     # Services
-    app.add_handler(CommandHandler("services", cmd_services))
-    app.add_handler(CommandHandler("startservice", cmd_start_service))
-    app.add_handler(CommandHandler("stopservice", cmd_stop_service))
-    app.add_handler(CommandHandler("restart", cmd_restart_service))
-    app.add_handler(CommandHandler("logs", cmd_logs))
+    (("services",), lazy("handlers.commands", "cmd_services")),
+    (("startservice",), lazy("handlers.commands", "cmd_start")),
+    (("stopservice",), lazy("handlers.commands", "cmd_stop")),
+    (("restart",), lazy("handlers.commands", "cmd_restart")),
+    (("logs",), lazy("handlers.commands", "cmd_logs")),
 
     # Docker
-    app.add_handler(CommandHandler("docker", cmd_docker))
+    (("docker",), lazy("handlers.commands", "cmd_docker")),
 
     # Monitoring
-    app.add_handler(CommandHandler("monitoring", cmd_monitoring))
-    app.add_handler(CommandHandler("llm", cmd_llm))
+    (("monitoring",), lazy("handlers.commands", "cmd_monitoring")),
+    (("llm",), lazy("handlers.commands", "cmd_llm")),
 
     # Alerting
-    app.add_handler(CommandHandler("alert", cmd_alert))
-    app.add_handler(CommandHandler("alerts", cmd_alert))  # Alias
+    (("alert", "alerts"), lazy("handlers.commands", "cmd_alert")),
 
     # Interactive menu
-    app.add_handler(CommandHandler("menu", cmd_menu))
-    app.add_handler(callback_handler)
+    (("menu",), lazy("handlers.keyboard", "cmd_menu")),
 
     # Visual / Charts
-    app.add_handler(CommandHandler("screenshot", cmd_screenshot))
-    app.add_handler(CommandHandler("chart", cmd_chart))
+    (("screenshot",), lazy("handlers.commands", "cmd_screenshot")),
+    (("chart",), lazy("handlers.commands", "cmd_chart")),
 
     # File operations
-    app.add_handler(CommandHandler("download", cmd_download))
-    app.add_handler(CommandHandler("ls", cmd_ls))
-    app.add_handler(CommandHandler("cat", cmd_cat))
+    (("download",), lazy("handlers.files", "cmd_download")),
+    (("ls",), lazy("handlers.files", "cmd_ls")),
+    (("cat",), lazy("handlers.files", "cmd_cat")),
 
     # Scheduling
-    app.add_handler(CommandHandler("schedule", cmd_schedule))
+    (("schedule",), lazy("handlers.commands", "cmd_schedule")),
 
     # Memory System
-    app.add_handler(CommandHandler("memory_view", cmd_memory_view))
-    app.add_handler(CommandHandler("memory_add", cmd_memory_add))
-    app.add_handler(CommandHandler("memory_del", cmd_memory_del))
-    app.add_handler(CommandHandler("server_log", cmd_server_log))
-    app.add_handler(CommandHandler("proactive", cmd_proactive))
-    app.add_handler(CommandHandler("insights", cmd_insights))
+    (("memory_view",), lazy("handlers.memory_cmd", "cmd_memory_view")),
+    (("memory_add",), lazy("handlers.memory_cmd", "cmd_memory_add")),
+    (("memory_del",), lazy("handlers.memory_cmd", "cmd_memory_delete")),
+    (("server_log",), lazy("handlers.memory_cmd", "cmd_server_logs")),
+    (("proactive",), lazy("handlers.memory_cmd", "cmd_proactive_status")),
+    (("insights",), lazy("handlers.memory_cmd", "cmd_insights")),
 
     # Utility
-    app.add_handler(CommandHandler("conda", cmd_conda))
-    app.add_handler(CommandHandler("ollama", cmd_ollama))
-    app.add_handler(CommandHandler("stats", cmd_stats))
-    app.add_handler(CommandHandler("history", cmd_history))
+    (("conda",), lazy("handlers.commands", "cmd_conda")),
+    (("ollama",), lazy("handlers.commands", "cmd_ollama")),
+    (("stats",), lazy("handlers.commands", "cmd_stats")),
+    (("history",), lazy("handlers.commands", "cmd_history")),
 
     # Claude Code
-    app.add_handler(CommandHandler("claude", handle_claude_command))
-    app.add_handler(CommandHandler("c", handle_claude_command))  # Short alias
+    (("claude", "c"), lazy("handlers.claude", "handle_claude_command")),
 
     # Dangerous commands (require confirmation)
-    app.add_handler(CommandHandler("confirm", cmd_confirm))
-    app.add_handler(CommandHandler("reboot", cmd_reboot))
-    app.add_handler(CommandHandler("shutdown", cmd_shutdown))
-    app.add_handler(CommandHandler("kill", cmd_kill))
+    (("confirm",), lazy("handlers.commands", "cmd_confirm")),
+    (("reboot",), lazy("handlers.commands", "cmd_reboot")),
+    (("shutdown",), lazy("handlers.commands", "cmd_shutdown")),
+    (("kill",), lazy("handlers.commands", "cmd_kill")),
+)
 
-    # Email conversation handler (must be before catch-all)
-    app.add_handler(email_conversation_handler)
 
-    # File uploads (before catch-all)
-    app.add_handler(file_upload_handler)
+# Whitelist checked in PTB's filter tree, before any callback is scheduled
+ALLOWED = filters.User(user_ids=config.allowed_users)
+TEXT_FROM_ALLOWED = filters.TEXT & ~filters.COMMAND & ALLOWED
 
-    # Natural language messages (catch-all)
-    app.add_handler(MessageHandler(
-        filters.TEXT & ~filters.COMMAND,
-        handle_message
-    ))
+
+def setup_handlers(app: Application) -> None:
+    """Register all command and message handlers"""
+    handlers = [
+        CommandHandler(list(names), callback, filters=ALLOWED)
+        for names, callback in COMMANDS
+    ]
+
+    app.add_handlers(handlers + [
+        # Inline keyboard buttons
+        callback_handler,
+
+        # Email conversation handler (must be before catch-all)
+        email_conversation_handler,
+
+        # File uploads (before catch-all)
+        file_upload_handler,
+
+        # Natural language messages (catch-all). Non-blocking so a burst in
+        # one chat reaches per_chat_backpressure instead of queueing here
+        MessageHandler(TEXT_FROM_ALLOWED, lazy("handlers.llm", "handle_message"), block=False),
+    ])
 
 
 async def error_handler(update: Update, context) -> None:
     """Handle errors gracefully"""
-    logger.error(f"Exception while handling an update: {context.error}")
+    logger.error(
+        "Exception while handling update %s",
+        getattr(update, "update_id", "?"),
+        exc_info=context.error,
+    )
 
-    if update and update.effective_message:
-        await update.effective_message.reply_text(
-            f"An error occurred: {str(context.error)}"
+    # Don't block the error path on the Telegram API or leak error details.
+    # The application keeps the task alive; if the reply fails it comes back
+    # here with update=None, so it can't loop
+    if isinstance(update, Update) and update.effective_message:
+        context.application.create_task(
+            update.effective_message.reply_text("An error occurred, please retry.")
         )
 
 
@@ -263,14 +407,37 @@ async def post_init(app: Application) -> None:
     """Post-initialization hook - setup all components"""
     logger.info("Bot initialized successfully")
 
+    # Periodic flush of the buffered log file
+    loop = asyncio.get_running_loop()
+    loop.call_later(LOG_FLUSH_INTERVAL, _schedule_log_flush, loop)
+
+    # Health check server doesn't depend on the database, start it alongside
+    health_start = asyncio.create_task(health_checker.start())
+
     # Connect to database
     if await db.connect():
         logger.info("Database connected successfully")
 
+        # Establish pooled connections before the first user command
+        try:
+            await db.warm_pool()
+        except Exception as e:
+            logger.warning(f"Database pool warm-up failed: {e}")
+
         # Initialize Memory System (requires database)
         try:
-            # Initialize Memory Manager
-            if await memory_manager.initialize(db.pool):
+            # All startup DDL and the memory cache load share one connection
+            # and one transaction; each component runs in its own savepoint
+            async with db.pool.acquire() as conn:
+                async with conn.transaction():
+                    memory_ok = await memory_manager.initialize_with_conn(db.pool, conn)
+                    logger_ok = await server_logger.initialize_with_conn(db.pool, conn)
+                    analyzer_ok = await conversation_analyzer.initialize_with_conn(
+                        db.pool, memory_manager, conn
+                    )
+
+            # Memory Manager (seed data needs the committed tables)
+            if memory_ok:
                 logger.info("Memory Manager initialized")
 
                 # Load seed data if needed
@@ -278,8 +445,8 @@ async def post_init(app: Application) -> None:
                 if seed_loaded:
                     logger.info("Seed data loaded into memory")
 
-            # Initialize Server Logger
-            if await server_logger.initialize(db.pool):
+            # Server Logger
+            if logger_ok:
                 logger.info("Server Logger initialized")
                 server_logger.log(
                     event_type='service_event',
@@ -289,11 +456,11 @@ async def post_init(app: Application) -> None:
                     source='telegram_bot'
                 )
 
-            # Initialize Conversation Analyzer
-            if await conversation_analyzer.initialize(db.pool, memory_manager):
+            # Conversation Analyzer
+            if analyzer_ok:
                 logger.info("Conversation Analyzer initialized")
 
-            # Initialize Proactive Agent
+            # Proactive Agent
             if await proactive_agent.initialize(app.bot, memory_manager, server_logger):
                 proactive_agent.start()
                 logger.info("Proactive Agent started")
@@ -322,8 +489,8 @@ async def post_init(app: Application) -> None:
         watchdog.notify_ready()
         watchdog.notify_status("Bot running, accepting messages")
 
-    # Start health check HTTP server
-    await health_checker.start()
+    # Wait for health check HTTP server
+    await health_start
 
     # Start task scheduler
     if config.admin_users:
@@ -331,6 +498,20 @@ async def post_init(app: Application) -> None:
         scheduler.start()
         logger.info("Task scheduler started")
 
+    # Load the lazily-routed modules off the event loop now that we're serving
+    loop.run_in_executor(None, _warm_imports)
+
+
+async def _stop(name: str, coro, timeout: float) -> None:
+    """Await a shutdown step with a timeout, logging instead of raising"""
+    try:
+        await asyncio.wait_for(coro, timeout)
+        logger.info(f"{name} stopped")
+    except asyncio.TimeoutError:
+        logger.warning(f"Timed out stopping {name} after {timeout}s")
+    except Exception as e:
+        logger.warning(f"Error stopping {name}: {e}")
+
 
 async def post_shutdown(app: Application) -> None:
     """Graceful shutdown hook - cleanup all resources"""
@@ -352,67 +533,49 @@ async def post_shutdown(app: Application) -> None:
     except:
         pass
 
-    # Stop Proactive Agent
-    try:
-        proactive_agent.stop()
-        logger.info("Proactive Agent stopped")
-    except Exception as e:
-        logger.warning(f"Error stopping proactive agent: {e}")
-
-    # Stop Conversation Analyzer
-    try:
-        await conversation_analyzer.stop()
-        logger.info("Conversation Analyzer stopped")
-    except Exception as e:
-        logger.warning(f"Error stopping conversation analyzer: {e}")
-
-    # Stop Server Logger (flushes remaining events)
-    try:
-        await server_logger.stop()
-        logger.info("Server Logger stopped")
-    except Exception as e:
-        logger.warning(f"Error stopping server logger: {e}")
+    # Cheap synchronous stops first
+    for name, stop in (
+        ("Proactive Agent", proactive_agent.stop),
+        ("Smart Alerter", smart_alerter.stop),
+        ("Scheduler", scheduler.stop),
+    ):
+        try:
+            stop()
+            logger.info(f"{name} stopped")
+        except Exception as e:
+            logger.warning(f"Error stopping {name}: {e}")
 
-    # Stop Smart Alerter
-    try:
-        smart_alerter.stop()
-        logger.info("Smart Alerter stopped")
-    except Exception as e:
-        logger.warning(f"Error stopping smart alerter: {e}")
+    # Independent async stops run concurrently, each with its own timeout
+    stops = [
+        _stop("Conversation Analyzer", conversation_analyzer.stop(), 5),
+        _stop("Server Logger", server_logger.stop(), 5),  # flushes remaining events
+        _stop("Health checker", health_checker.stop(), 2),
+    ]
 
-    # Stop health check server
-    try:
-        await health_checker.stop()
-    except Exception as e:
-        logger.warning(f"Error stopping health checker: {e}")
+    # Cancel any running Claude process (only if the module was ever loaded)
+    claude_module = sys.modules.get("handlers.claude")
+    if claude_module and claude_module.claude_runner.is_running:
+        stops.append(_stop("Claude process", claude_module.claude_runner.cancel(), 5))
 
-    # Stop task scheduler
-    try:
-        scheduler.stop()
-    except Exception as e:
-        logger.warning(f"Error stopping scheduler: {e}")
+    await asyncio.gather(*stops)
 
-    # Cancel any running Claude processes
-    try:
-        from handlers.claude import claude_runner
-        if claude_runner.is_running:
-            await claude_runner.cancel()
-            logger.info("Claude process cancelled")
-    except Exception as e:
-        logger.warning(f"Error cancelling Claude process: {e}")
+    if claude_module:
+        claude_module.claude_runner.close_persistent()
 
-    # Close database connection
-    try:
-        await db.close()
-        logger.info("Database connection closed")
-    except Exception as e:
-        logger.warning(f"Error closing database: {e}")
+    # Close database connection last: the stops above may still write to it
+    await _stop("Database connection", db.close(), 5)
 
     logger.info("Bot shutdown complete")
 
+    # Drain queued log records, stop the listener thread and flush to disk
+    if log_listener:
+        log_listener.stop()
+        file_handler.flush()
+
 
 def main():
     """Main entry point"""
+    _setup_logging()
 
     # =========================================================================
     # SINGLE INSTANCE CHECK - Exit if another instance is running
@@ -428,6 +591,15 @@ def main():
 
     logger.info(f"Bot starting with PID {os.getpid()}")
 
+    # Use uvloop as the event loop if available (optional dependency)
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("Using uvloop event loop")
+        except ImportError:
+            pass
+
     # Check token
     if not config.telegram_token:
         print("ERROR: TELEGRAM_BOT_TOKEN is not set!")
@@ -440,10 +612,40 @@ def main():
         print("WARNING: No allowed users configured. Bot will deny all requests.")
         print("Add TELEGRAM_ALLOWED_USERS to your .env file.")
 
+    # Optionally pin the process to a couple of cores to keep the event loop
+    # cache-warm (Linux only, opt-in via PIN_CPU=1)
+    if os.environ.get("PIN_CPU") == "1" and hasattr(os, "sched_setaffinity"):
+        try:
+            cores = set(sorted(os.sched_getaffinity(0))[:2])
+            os.sched_setaffinity(0, cores)
+            logger.info(f"Pinned to CPUs {sorted(cores)}")
+        except OSError as e:
+            logger.warning(f"Could not set CPU affinity: {e}")
+
+    # HTTP clients: a wide pool for outbound API calls so bursts of replies
+    # don't queue on a single connection, and a dedicated one for long polling
+    request = HTTPXRequest(
+        connection_pool_size=256,
+        pool_timeout=5,
+        connect_timeout=5,
+        read_timeout=10
+    )
+    get_updates_request = HTTPXRequest(connection_pool_size=1, read_timeout=35)
+
     # Create application
+    # Outbound calls go through token-bucket limiters (global, per group and
+    # per private chat) to stay under Telegram's flood limits instead of
+    # retrying on 429s
     app = (
         Application.builder()
         .token(config.telegram_token)
+        .request(request)
+        .get_updates_request(get_updates_request)
+        .rate_limiter(ChatRateLimiter(
+            overall_max_rate=28,
+            overall_time_period=1,
+            max_retries=3
+        ))
         .post_init(post_init)
         .post_shutdown(post_shutdown)
         .build()
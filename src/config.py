@@ -6,31 +6,50 @@ All sensitive data should be in .env file (not committed to git).
 """
 
 import os
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from pathlib import Path
-from dotenv import load_dotenv
+from types import MappingProxyType
 
 # Load environment variables from .env file
-# First try project directory, then home directory
-env_paths = [
-    Path(__file__).parent.parent / ".env",  # Project root
-    Path.home() / ".env",                    # Home directory
-]
-
-for env_path in env_paths:
-    if env_path.exists():
-        load_dotenv(env_path)
-        break
-
-
-@dataclass
+# First try project directory, then home directory.
+# Skipped when the environment is already provided (e.g. systemd EnvironmentFile)
+if not os.environ.get("TELEGRAM_BOT_TOKEN"):
+    try:
+        from dotenv import load_dotenv
+
+        for env_path in (
+            Path(__file__).parent.parent / ".env",  # Project root
+            Path.home() / ".env",                    # Home directory
+        ):
+            if env_path.exists():
+                load_dotenv(env_path)
+                break
+    except ImportError:
+        pass
+
+
+def _int_list(name: str) -> tuple[int, ...]:
+    """Parse a comma-separated list of integer IDs from an env var"""
+    return tuple(
+        int(uid) for s in os.getenv(name, "").split(",") if (uid := s.strip()).isdigit()
+    )
+
+
+def _getint(name: str, default: int) -> int:
+    """Read an integer env var with a default"""
+    return int(os.environ.get(name, default))
+
+
+# slots=True: fields are read on every dispatch. Not frozen because
+# /alert on|off toggles alert_enabled at runtime.
+@dataclass(slots=True)
 class BotConfig:
     """Bot configuration loaded from environment variables"""
 
     # Telegram Settings
     telegram_token: str = ""
-    allowed_users: list[int] = field(default_factory=list)
-    admin_users: list[int] = field(default_factory=list)
+    allowed_users: frozenset[int] = frozenset()
+    admin_users: frozenset[int] = frozenset()
 
     # API Keys for LLM Providers
     groq_api_key: str = ""
@@ -43,6 +62,8 @@ class BotConfig:
     db_name: str = "talk2server"
     db_user: str = ""
     db_password: str = ""
+    db_pool_min: int = 10  # connections opened at startup
+    db_pool_max: int = 50  # upper bound under concurrent updates
 
     # Service URLs
     ollama_url: str = "http://localhost:11434"
@@ -55,14 +76,15 @@ class BotConfig:
     # LLM Settings
     default_ollama_model: str = "llama3.2:3b"
     default_claude_model: str = "opus"  # sonnet, opus, haiku
-    groq_models: list[str] = field(default_factory=lambda: [
+    claude_persistent: bool = False   # keep one Claude CLI per user between prompts
+    groq_models: tuple[str, ...] = (
         # Production Models
         "llama-3.3-70b-versatile",
         "llama-3.1-8b-instant",
         # Preview Models
         "llama-3.2-90b-text-preview",
         "mixtral-8x7b-32768",
-    ])
+    )
     openai_model: str = "gpt-4o-mini"
 
     # Message Settings
@@ -89,9 +111,7 @@ class BotConfig:
     health_check_port: int = 8765     # HTTP health check port
 
     # Critical Services to Monitor
-    critical_services: list[str] = field(default_factory=lambda: [
-        "postgresql"
-    ])
+    critical_services: tuple[str, ...] = ("postgresql",)
 
     # Email Settings (optional)
     smtp_host: str = "smtp.gmail.com"
@@ -104,29 +124,16 @@ class BotConfig:
     def from_env(cls) -> "BotConfig":
         """Load configuration from environment variables"""
 
-        # Parse allowed users (comma-separated list of IDs)
-        allowed_users_str = os.getenv("TELEGRAM_ALLOWED_USERS", "")
-        allowed_users = [
-            int(uid.strip())
-            for uid in allowed_users_str.split(",")
-            if uid.strip().isdigit()
-        ]
-
-        # Parse admin users
-        admin_users_str = os.getenv("TELEGRAM_ADMIN_USERS", "")
-        admin_users = [
-            int(uid.strip())
-            for uid in admin_users_str.split(",")
-            if uid.strip().isdigit()
-        ]
+        # Parse allowed/admin users (comma-separated list of IDs)
+        # Stored as frozensets: membership is checked on every update
+        allowed_users = frozenset(_int_list("TELEGRAM_ALLOWED_USERS"))
+        admin_users = frozenset(_int_list("TELEGRAM_ADMIN_USERS"))
 
         # Parse critical services
         critical_services_str = os.getenv("CRITICAL_SERVICES", "postgresql")
-        critical_services = [
-            s.strip()
-            for s in critical_services_str.split(",")
-            if s.strip()
-        ]
+        critical_services = tuple(
+            name for s in critical_services_str.split(",") if (name := s.strip())
+        )
 
         # Set up paths
         home = Path.home()
@@ -145,22 +152,25 @@ class BotConfig:
 
             # Database
             db_host=os.getenv("POSTGRES_HOST", "localhost"),
-            db_port=int(os.getenv("POSTGRES_PORT", "5432")),
+            db_port=_getint("POSTGRES_PORT", 5432),
             db_name=os.getenv("POSTGRES_DB", "talk2server"),
             db_user=os.getenv("POSTGRES_USER", ""),
             db_password=os.getenv("POSTGRES_PASSWORD", ""),
+            db_pool_min=_getint("POSTGRES_POOL_MIN", 10),
+            db_pool_max=_getint("POSTGRES_POOL_MAX", 50),
 
             # Service URLs
             ollama_url=os.getenv("OLLAMA_URL", "http://localhost:11434"),
             prometheus_url=os.getenv("PROMETHEUS_URL", "http://localhost:9090"),
 
             # Rate Limiting
-            rate_limit=int(os.getenv("RATE_LIMIT", "60")),
-            rate_window=int(os.getenv("RATE_WINDOW", "60")),
+            rate_limit=_getint("RATE_LIMIT", 60),
+            rate_window=_getint("RATE_WINDOW", 60),
 
             # LLM Settings
             default_ollama_model=os.getenv("DEFAULT_OLLAMA_MODEL", "llama3.2:3b"),
             default_claude_model=os.getenv("DEFAULT_CLAUDE_MODEL", "opus"),
+            claude_persistent=os.getenv("CLAUDE_PERSISTENT", "false").lower() == "true",
             openai_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
 
             # Paths
@@ -169,24 +179,24 @@ class BotConfig:
             workspace_dir=os.getenv("WORKSPACE_DIR", str(home / "claude_workspace")),
 
             # Alerts
-            alert_gpu_temp=int(os.getenv("ALERT_GPU_TEMP", "80")),
-            alert_gpu_memory_percent=int(os.getenv("ALERT_GPU_MEMORY", "95")),
-            alert_disk_percent=int(os.getenv("ALERT_DISK", "90")),
-            alert_memory_percent=int(os.getenv("ALERT_MEMORY", "90")),
-            alert_cpu_percent=int(os.getenv("ALERT_CPU", "95")),
-            alert_check_interval=int(os.getenv("ALERT_CHECK_INTERVAL", "60")),
-            alert_cooldown=int(os.getenv("ALERT_COOLDOWN", "300")),
+            alert_gpu_temp=_getint("ALERT_GPU_TEMP", 80),
+            alert_gpu_memory_percent=_getint("ALERT_GPU_MEMORY", 95),
+            alert_disk_percent=_getint("ALERT_DISK", 90),
+            alert_memory_percent=_getint("ALERT_MEMORY", 90),
+            alert_cpu_percent=_getint("ALERT_CPU", 95),
+            alert_check_interval=_getint("ALERT_CHECK_INTERVAL", 60),
+            alert_cooldown=_getint("ALERT_COOLDOWN", 300),
             alert_enabled=os.getenv("ALERT_ENABLED", "true").lower() == "true",
 
             # Health Check
-            health_check_port=int(os.getenv("HEALTH_CHECK_PORT", "8765")),
+            health_check_port=_getint("HEALTH_CHECK_PORT", 8765),
 
             # Critical Services
             critical_services=critical_services,
 
             # Email
             smtp_host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
-            smtp_port=int(os.getenv("SMTP_PORT", "587")),
+            smtp_port=_getint("SMTP_PORT", 587),
             smtp_user=os.getenv("SMTP_USER", ""),
             smtp_password=os.getenv("SMTP_PASSWORD", ""),
             notification_email=os.getenv("NOTIFICATION_EMAIL", ""),
@@ -223,8 +233,8 @@ class BotConfig:
 config = BotConfig.from_env()
 
 
-# Service definitions for management
-MANAGED_SERVICES = {
+# Service definitions for management (read-only)
+MANAGED_SERVICES = MappingProxyType({
     # Systemd services
     "ollama": {"type": "systemd", "name": "ollama"},
     "postgresql": {"type": "systemd", "name": "postgresql"},
@@ -232,15 +242,15 @@ MANAGED_SERVICES = {
 
     # Docker containers (add your own)
     # "my-app": {"type": "docker", "name": "my-app-container"},
-}
+})
 
 # Dangerous commands that require confirmation
-DANGEROUS_COMMANDS = {
+DANGEROUS_COMMANDS = MappingProxyType({
     "reboot": "System will be rebooted",
     "shutdown": "System will be shut down",
     "kill": "Process will be terminated",
     "rm": "File will be deleted",
-}
+})
 
 # LLM Provider priority for fallback
-LLM_FALLBACK_ORDER = ["ollama", "groq", "openai"]
+LLM_FALLBACK_ORDER: tuple[str, ...] = ("ollama", "groq", "openai")
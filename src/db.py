@@ -7,59 +7,523 @@ Uses PostgreSQL with asyncpg for async operations.
 
 import asyncio
 import functools
-from datetime import datetime
-from typing import Optional, Callable, TypeVar, ParamSpec
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Optional, Callable, TypeVar, AsyncIterator
 
 import asyncpg
 
 from config import config
 
+logger = logging.getLogger(__name__)
+
+# orjson is optional - fall back to the stdlib encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+
+def _jsonb_encode(value) -> bytes:
+    """Encode a value as binary JSONB (version byte + JSON text)"""
+    if isinstance(value, str):  # Already serialized by the caller
+        return b'\x01' + value.encode()
+    if ORJSON_AVAILABLE:
+        return b'\x01' + orjson.dumps(value)
+    return b'\x01' + json.dumps(value).encode()
+
+
+def _jsonb_decode(data: bytes):
+    """Decode binary JSONB into Python objects"""
+    return orjson.loads(data[1:]) if ORJSON_AVAILABLE else json.loads(data[1:])
+
 
 # Type hints for decorator
-P = ParamSpec('P')
 T = TypeVar('T')
 
 
-def with_retry(max_retries: int = 3, base_delay: float = 0.5):
+# Connection-level failures worth retrying; anything else is a query error
+RETRYABLE_ERRORS = (
+    asyncpg.PostgresConnectionError,
+    asyncpg.ConnectionDoesNotExistError,
+    ConnectionRefusedError,
+    OSError,
+)
+
+# Server refused a new connection: retry, but back off harder than a blip
+OVERLOAD_ERRORS = (asyncpg.TooManyConnectionsError,)
+OVERLOAD_BACKOFF = 4
+
+
+def db_op(
+    default=None,
+    retries: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 10.0,
+    acquire: bool = True,
+    retry: bool = True
+):
     """
-    Decorator for retrying database operations with exponential backoff.
+    Decorator for Database methods.
+
+    Returns `default` when there is no pool or the operation fails, acquires a
+    pooled connection and passes it as the first argument after self, and
+    retries connection errors with capped, jittered exponential backoff.
+    Non-idempotent writes should pass retry=False: a connection lost after
+    the statement was sent may already have committed it.
 
     Args:
-        max_retries: Maximum number of retry attempts
+        default: Value returned on failure (called if it's a type, e.g. list)
+        retries: Maximum number of retry attempts
         base_delay: Base delay between retries (doubles each attempt)
+        max_delay: Upper bound for a single retry delay
+        acquire: Pass an acquired connection to the method
+        retry: Retry connection errors (disable for INSERTs)
     """
-    def decorator(func: Callable[P, T]) -> Callable[P, T]:
+    if not retry:
+        retries = 0
+
+    def _default():
+        return default() if isinstance(default, type) else default
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @functools.wraps(func)
-        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            last_exception = None
-            for attempt in range(max_retries + 1):
+        async def wrapper(self: "Database", *args, **kwargs) -> T:
+            if not self.pool:
+                return _default()
+
+            for attempt in range(retries + 1):
                 try:
-                    return await func(*args, **kwargs)
-                except (asyncpg.PostgresConnectionError,
-                        asyncpg.InterfaceError,
-                        ConnectionRefusedError,
-                        OSError) as e:
-                    last_exception = e
-                    if attempt < max_retries:
+                    if not acquire:
+                        return await func(self, *args, **kwargs)
+                    async with self.pool.acquire() as conn:
+                        return await func(self, conn, *args, **kwargs)
+                except RETRYABLE_ERRORS + OVERLOAD_ERRORS as e:
+                    if attempt < retries:
                         delay = base_delay * (2 ** attempt)
-                        print(f"DB retry {attempt + 1}/{max_retries} after {delay}s: {e}")
+                        if isinstance(e, OVERLOAD_ERRORS):
+                            delay *= OVERLOAD_BACKOFF
+                        # Equal jitter so retrying callers don't wake in lockstep
+                        delay = min(max_delay, delay)
+                        delay = delay / 2 + random.uniform(0, delay / 2)
+                        logger.warning(
+                            "DB retry %d/%d for %s after %.2fs: %s",
+                            attempt + 1, retries, func.__name__, delay, e
+                        )
                         await asyncio.sleep(delay)
-                    continue
+                        continue
+                    logger.error("DB operation %s failed after %d retries: %s", func.__name__, retries, e)
                 except Exception:
-                    raise
+                    logger.exception("Error in DB operation %s", func.__name__)
+                break
 
-            print(f"DB operation failed after {max_retries} retries: {last_exception}")
-            raise last_exception
+            return _default()
         return wrapper
     return decorator
 
 
+# Write coalescing: fire-and-forget rows are buffered and sent with COPY
+WRITE_FLUSH_INTERVAL = 0.05  # seconds between flushes
+WRITE_FLUSH_ROWS = 500       # flush early once this many rows are waiting
+WRITE_BUFFER_MAX = 10000     # drop new rows beyond this (e.g. while the DB is down)
+
+MESSAGE_COLUMNS = (
+    "user_id", "username", "message_type", "user_message", "bot_response",
+    "provider", "model", "tokens_used", "response_time_ms",
+)
+SERVER_EVENT_COLUMNS = ("event_type", "severity", "message", "details")
+
+# Usage counters are summed in memory per (user_id, provider) and upserted
+# at most this often, instead of one row-locking UPDATE per request
+USAGE_FLUSH_INTERVAL = 5.0
+
+
+# Full schema, sent as one multi-statement execute (one round-trip, one
+# implicit transaction)
+SQL_SCHEMA = """
+    -- Chat messages table (monthly partitions, see Database.ensure_partitions)
+    CREATE TABLE IF NOT EXISTS telegram_messages (
+        id BIGSERIAL,
+        user_id BIGINT NOT NULL,
+        username VARCHAR(255),
+        message_type VARCHAR(50) NOT NULL,
+        user_message TEXT NOT NULL,
+        bot_response TEXT,
+        provider VARCHAR(50),
+        model VARCHAR(100),
+        tokens_used INTEGER,
+        response_time_ms INTEGER,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE INDEX IF NOT EXISTS idx_telegram_messages_user_id
+    ON telegram_messages(user_id);
+
+    CREATE INDEX IF NOT EXISTS idx_telegram_messages_created_at
+    ON telegram_messages(created_at);
+
+    -- History queries: WHERE user_id = $1 ORDER BY created_at DESC LIMIT n
+    -- No TEXT columns in INCLUDE: long responses would exceed the btree row
+    -- size limit, so the message text is read from the heap instead
+    DROP INDEX IF EXISTS idx_telegram_messages_user_created;
+    CREATE INDEX IF NOT EXISTS idx_telegram_messages_user_recent
+    ON telegram_messages(user_id, created_at DESC)
+    INCLUDE (message_type, provider, response_time_ms);
+
+    -- Claude Code sessions table
+    CREATE TABLE IF NOT EXISTS claude_sessions (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        session_end TIMESTAMP,
+        message_count INTEGER DEFAULT 0,
+        total_cost_usd DECIMAL(10, 4) DEFAULT 0,
+        working_directory TEXT,
+        is_active BOOLEAN DEFAULT TRUE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_claude_sessions_user_id
+    ON claude_sessions(user_id);
+
+    -- At most one active session per user: close older duplicates first,
+    -- then enforce it (also serves the active session lookups)
+    UPDATE claude_sessions cs
+    SET is_active = FALSE, session_end = COALESCE(cs.session_end, CURRENT_TIMESTAMP)
+    WHERE cs.is_active AND EXISTS (
+        SELECT 1 FROM claude_sessions newer
+        WHERE newer.user_id = cs.user_id AND newer.is_active AND newer.id > cs.id
+    );
+
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_claude_sessions_user_active
+    ON claude_sessions(user_id) WHERE is_active;
+
+    DROP INDEX IF EXISTS idx_claude_sessions_user_active;
+
+    -- Claude session messages
+    CREATE TABLE IF NOT EXISTS claude_session_messages (
+        id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        session_id INTEGER REFERENCES claude_sessions(id),
+        role VARCHAR(20) NOT NULL,
+        content TEXT NOT NULL,
+        cost_usd DECIMAL(10, 4),
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_claude_session_messages_session_id
+    ON claude_session_messages(session_id);
+
+    -- Usage statistics (daily aggregates)
+    CREATE TABLE IF NOT EXISTS usage_stats (
+        id SERIAL PRIMARY KEY,
+        date DATE NOT NULL,
+        user_id BIGINT NOT NULL,
+        provider VARCHAR(50) NOT NULL,
+        request_count INTEGER DEFAULT 0,
+        total_tokens INTEGER DEFAULT 0,
+        estimated_cost_usd DECIMAL(10, 4) DEFAULT 0,
+        UNIQUE(date, user_id, provider)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_usage_stats_date
+    ON usage_stats(date);
+
+    -- User memory/preferences table
+    CREATE TABLE IF NOT EXISTS user_memory (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        memory_type VARCHAR(50) NOT NULL,
+        key VARCHAR(255) NOT NULL,
+        value TEXT,
+        metadata JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, memory_type, key)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_user_memory_user_id
+    ON user_memory(user_id);
+
+    -- Server events log (monthly partitions, created UNLOGGED: append-heavy,
+    -- not worth WAL)
+    CREATE TABLE IF NOT EXISTS server_events (
+        id BIGSERIAL,
+        event_type VARCHAR(50) NOT NULL,
+        severity VARCHAR(20) NOT NULL,
+        message TEXT NOT NULL,
+        details JSONB,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE INDEX IF NOT EXISTS idx_server_events_created_at
+    ON server_events(created_at);
+
+    CREATE INDEX IF NOT EXISTS idx_server_events_type
+    ON server_events(event_type);
+
+    -- Migrate existing installs: created_at TIMESTAMP -> TIMESTAMPTZ
+    DO $$
+    DECLARE
+        t TEXT;
+    BEGIN
+        FOREACH t IN ARRAY ARRAY['telegram_messages', 'claude_session_messages', 'server_events'] LOOP
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                  AND table_name = t
+                  AND column_name = 'created_at'
+                  AND data_type = 'timestamp without time zone'
+            ) THEN
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN created_at TYPE TIMESTAMPTZ', t);
+            END IF;
+        END LOOP;
+    END $$;
+"""
+
+# Active Claude session lookups are cached per user for this long (seconds);
+# start/end/set_active update the cache directly
+SESSION_CACHE_TTL = 30.0
+
+# Rows fetched per round-trip when streaming results through a cursor
+CURSOR_PREFETCH = 50
+
+# Time-partitioned tables (installs created before partitioning keep plain tables)
+PARTITIONED_TABLES = ("telegram_messages", "server_events")
+UNLOGGED_PARTITIONS = ("server_events",)
+PARTITION_MONTHS_AHEAD = 2
+
+SQL_IS_PARTITIONED = """
+    SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass($1)
+"""
+
+# SQL statements, kept as module constants so every call reuses the same
+# text and hits asyncpg's per-connection prepared statement cache
+SQL_MERGE_USAGE = """
+    INSERT INTO usage_stats (date, user_id, provider, request_count, total_tokens, estimated_cost_usd)
+    VALUES (CURRENT_DATE, $1, $2, $3, $4, $5)
+    ON CONFLICT (date, user_id, provider)
+    DO UPDATE SET
+        request_count = usage_stats.request_count + EXCLUDED.request_count,
+        total_tokens = usage_stats.total_tokens + EXCLUDED.total_tokens,
+        estimated_cost_usd = usage_stats.estimated_cost_usd + EXCLUDED.estimated_cost_usd
+"""
+
+SQL_LOG_MESSAGE = """
+    INSERT INTO telegram_messages
+    (user_id, username, message_type, user_message, bot_response,
+     provider, model, tokens_used, response_time_ms)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    RETURNING id
+"""
+
+SQL_END_ACTIVE_SESSIONS = """
+    UPDATE claude_sessions
+    SET is_active = FALSE, session_end = CURRENT_TIMESTAMP
+    WHERE user_id = $1 AND is_active = TRUE
+"""
+
+# Close the user's active sessions and open a new one in a single statement.
+# Selecting from `closed` makes the UPDATE run before the INSERT.
+SQL_START_SESSION = """
+    WITH closed AS (
+        UPDATE claude_sessions
+        SET is_active = FALSE, session_end = CURRENT_TIMESTAMP
+        WHERE user_id = $1 AND is_active = TRUE
+        RETURNING 1
+    )
+    INSERT INTO claude_sessions (user_id, working_directory)
+    SELECT $1, $2 FROM (SELECT COUNT(*) FROM closed) AS c
+    RETURNING id
+"""
+
+SQL_GET_ACTIVE_SESSION = """
+    SELECT id FROM claude_sessions
+    WHERE user_id = $1 AND is_active = TRUE
+    ORDER BY session_start DESC
+    LIMIT 1
+"""
+
+# Insert the message and bump the session counters in one round-trip
+SQL_ADD_CLAUDE_MESSAGE = """
+    WITH ins AS (
+        INSERT INTO claude_session_messages (session_id, role, content, cost_usd)
+        VALUES ($1, $2, $3, $4)
+        RETURNING session_id, cost_usd
+    )
+    UPDATE claude_sessions cs
+    SET message_count = cs.message_count + 1,
+        total_cost_usd = cs.total_cost_usd + COALESCE(ins.cost_usd, 0)
+    FROM ins
+    WHERE cs.id = ins.session_id
+"""
+
+SQL_END_SESSION = """
+    UPDATE claude_sessions
+    SET is_active = FALSE, session_end = CURRENT_TIMESTAMP
+    WHERE id = $1
+"""
+
+SQL_MSG_COUNTS = """
+    SELECT message_type, COUNT(*) as count
+    FROM telegram_messages
+    WHERE user_id = $1 AND created_at > CURRENT_DATE - $2
+    GROUP BY message_type
+"""
+
+SQL_PROVIDER_USAGE = """
+    SELECT provider, SUM(request_count) as requests,
+           SUM(total_tokens) as tokens,
+           SUM(estimated_cost_usd) as cost
+    FROM usage_stats
+    WHERE user_id = $1 AND date > CURRENT_DATE - $2
+    GROUP BY provider
+"""
+
+SQL_CLAUDE_SUMMARY = """
+    SELECT COUNT(*) as sessions,
+           SUM(message_count) as messages,
+           SUM(total_cost_usd) as cost
+    FROM claude_sessions
+    WHERE user_id = $1 AND session_start > CURRENT_DATE - $2
+"""
+
+SQL_RECENT_MESSAGES = """
+    SELECT message_type, user_message, bot_response, provider, created_at
+    FROM telegram_messages
+    WHERE user_id = $1
+    ORDER BY created_at DESC
+    LIMIT $2
+"""
+
+SQL_CHAT_HISTORY = """
+    SELECT * FROM (
+        SELECT id, message_type, user_message, bot_response,
+               provider, response_time_ms, created_at
+        FROM telegram_messages
+        WHERE user_id = $1
+        ORDER BY created_at DESC
+        LIMIT $2
+    ) AS recent
+    ORDER BY created_at
+"""
+
+SQL_MESSAGE_COUNT = """
+    SELECT COUNT(*) FROM telegram_messages
+    WHERE user_id = $1
+"""
+
+# No-op if the user already has an active session (uq_claude_sessions_user_active)
+SQL_INSERT_ACTIVE_SESSION = """
+    INSERT INTO claude_sessions (user_id, is_active)
+    VALUES ($1, TRUE)
+    ON CONFLICT DO NOTHING
+"""
+
+SQL_SET_USER_MEMORY = """
+    INSERT INTO user_memory (user_id, memory_type, key, value, metadata)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (user_id, memory_type, key)
+    DO UPDATE SET
+        value = $4,
+        metadata = $5,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+SQL_USER_MEMORY_BY_KEY = """
+    SELECT * FROM user_memory
+    WHERE user_id = $1 AND memory_type = $2 AND key = $3
+"""
+
+SQL_USER_MEMORY_BY_TYPE = """
+    SELECT * FROM user_memory
+    WHERE user_id = $1 AND memory_type = $2
+"""
+
+SQL_USER_MEMORY = """
+    SELECT * FROM user_memory
+    WHERE user_id = $1
+"""
+
+SQL_SERVER_EVENTS_BY_TYPE = """
+    SELECT * FROM server_events
+    WHERE event_type = $1
+    ORDER BY created_at DESC
+    LIMIT $2
+"""
+
+SQL_SERVER_EVENTS = """
+    SELECT * FROM server_events
+    ORDER BY created_at DESC
+    LIMIT $1
+"""
+
+
+@dataclass
+class _WriteBuffer:
+    """Rows waiting to be flushed, per target table"""
+    messages: list[tuple] = field(default_factory=list)
+    server_events: list[tuple] = field(default_factory=list)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __len__(self) -> int:
+        return len(self.messages) + len(self.server_events)
+
+    def swap(self) -> "_WriteBuffer":
+        """Take the buffered rows, leaving this buffer empty"""
+        taken = _WriteBuffer(self.messages, self.server_events)
+        self.messages, self.server_events = [], []
+        return taken
+
+    def restore(self, taken: "_WriteBuffer", limit: int) -> int:
+        """Put back rows from a failed flush, up to `limit` in total; returns the number dropped"""
+        room = max(0, limit - len(self))
+        # Newest rows win when there isn't room for all of them
+        messages = taken.messages[len(taken.messages) - room:] if room else []
+        room -= len(messages)
+        server_events = taken.server_events[len(taken.server_events) - room:] if room else []
+        self.messages[:0] = messages
+        self.server_events[:0] = server_events
+        return len(taken) - len(messages) - len(server_events)
+
+
+class _Connection(asyncpg.Connection):
+    """Pool connection that keeps explicit prepared statements for the hottest queries"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hot_statements: dict[str, asyncpg.prepared_stmt.PreparedStatement] = {}
+
+    async def hot_statement(self, sql: str) -> asyncpg.prepared_stmt.PreparedStatement:
+        """Return the prepared statement for sql, preparing it on first use"""
+        stmt = self._hot_statements.get(sql)
+        if stmt is None:
+            stmt = self._hot_statements[sql] = await self.prepare(sql)
+        return stmt
+
+
 class Database:
     """Async PostgreSQL database handler with connection pooling"""
 
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
         self.dsn = f"postgresql://{config.db_user}:{config.db_password}@{config.db_host}:{config.db_port}/{config.db_name}"
+        self._writes = _WriteBuffer()
+        self._dropped_rows = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        # (user_id, provider) -> [requests, tokens, cost_usd]
+        self._usage_accum: defaultdict[tuple[int, str], list] = defaultdict(lambda: [0, 0, 0.0])
+        self._usage_flushed_at = time.monotonic()
+        # user_id -> (active Claude session id or None, expiry)
+        self._active_session: dict[int, tuple[Optional[int], float]] = {}
+        self._session_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
 
     async def connect(self) -> bool:
         """Initialize connection pool and create tables"""
@@ -67,136 +531,216 @@ class Database:
             try:
                 self.pool = await asyncpg.create_pool(
                     self.dsn,
-                    min_size=1,
-                    max_size=5
+                    min_size=min(config.db_pool_min, config.db_pool_max),
+                    max_size=config.db_pool_max,
+                    max_inactive_connection_lifetime=300,
+                    statement_cache_size=1024,
+                    max_cached_statement_lifetime=0,
+                    init=self._init_connection,
+                    connection_class=_Connection
                 )
                 await self._create_tables()
+                await self.ensure_partitions()
+                self._flush_task = asyncio.create_task(self._flush_loop())
                 return True
             except Exception as e:
-                print(f"Database connection failed: {e}")
+                logger.error("Database connection failed: %s", e)
                 return False
         return True
 
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection) -> None:
+        """
+        Per-connection setup: JSONB values are passed and returned as Python
+        objects, NUMERIC (costs) is returned as float instead of Decimal.
+        """
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=_jsonb_encode,
+            decoder=_jsonb_decode,
+            schema='pg_catalog',
+            format='binary'
+        )
+        await conn.set_type_codec(
+            'numeric',
+            encoder=str,
+            decoder=float,
+            schema='pg_catalog',
+            format='text'
+        )
+
+    async def warm_pool(self) -> None:
+        """Open min_size connections up front so the first query skips the handshake"""
+        if not self.pool:
+            return
+
+        async def _probe():
+            async with self.pool.acquire() as conn:
+                await conn.execute("SELECT 1")
+
+        await asyncio.gather(*[_probe() for _ in range(self.pool.get_min_size())])
+
     async def close(self):
-        """Close connection pool"""
+        """Flush buffered writes and close connection pool"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
         if self.pool:
             await self.pool.close()
             self.pool = None
 
+    @db_op()
+    async def ensure_partitions(
+        self,
+        conn: asyncpg.Connection,
+        months_ahead: int = PARTITION_MONTHS_AHEAD
+    ) -> None:
+        """Create monthly partitions for this month and the next few, plus a default"""
+        first_month = date.today().replace(day=1)
+
+        for table in PARTITIONED_TABLES:
+            if not await conn.fetchval(SQL_IS_PARTITIONED, table):
+                continue
+
+            unlogged = "UNLOGGED " if table in UNLOGGED_PARTITIONS else ""
+            statements = [
+                f"CREATE {unlogged}TABLE IF NOT EXISTS {table}_default "
+                f"PARTITION OF {table} DEFAULT"
+            ]
+
+            month = first_month
+            for _ in range(months_ahead + 1):
+                next_month = (month + timedelta(days=32)).replace(day=1)
+                statements.append(
+                    f"CREATE {unlogged}TABLE IF NOT EXISTS {table}_{month:%Y_%m} "
+                    f"PARTITION OF {table} FOR VALUES FROM ('{month}') TO ('{next_month}')"
+                )
+                month = next_month
+
+            for statement in statements:
+                try:
+                    await conn.execute(statement)
+                except asyncpg.PostgresError as e:
+                    # e.g. the default partition already holds rows for that month
+                    logger.warning("Could not create partition for %s: %s", table, e)
+
+    async def _stream(self, sql: str, *args) -> AsyncIterator[asyncpg.Record]:
+        """
+        Yield rows through a server-side cursor, CURSOR_PREFETCH at a time.
+
+        Holds a pooled connection until the consumer finishes, so keep the
+        loop body free of slow awaits. Errors are logged and end the stream.
+        """
+        if not self.pool:
+            return
+
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    async for record in conn.cursor(sql, *args, prefetch=CURSOR_PREFETCH):
+                        yield record
+        except Exception:
+            logger.exception("Error streaming DB rows")
+
+    def _queue_row(self, rows: list[tuple], row: tuple) -> None:
+        """Buffer a row for the next flush, waking the flusher when full"""
+        if len(self._writes) >= WRITE_BUFFER_MAX:
+            self._dropped_rows += 1
+            return
+        rows.append(row)
+        if len(self._writes) >= WRITE_FLUSH_ROWS:
+            self._writes.full.set()
+
+    async def _flush_loop(self):
+        """Background task that drains the write buffer"""
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._writes.full.wait(), WRITE_FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._writes.full.clear()
+                await self._flush_writes()
+                if time.monotonic() - self._usage_flushed_at >= USAGE_FLUSH_INTERVAL:
+                    await self._flush_usage()
+            except asyncio.CancelledError:
+                await self._flush_writes()  # Final flush
+                await self._flush_usage()
+                break
+            except Exception:
+                logger.exception("Error in DB flush loop")
+
+    async def _flush_writes(self):
+        """Write buffered rows with one COPY per table"""
+        if not len(self._writes) or not self.pool:
+            return
+
+        taken = self._writes.swap()
+        try:
+            # One transaction, so a failed batch never leaves half of it written
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    if taken.messages:
+                        await conn.copy_records_to_table(
+                            "telegram_messages",
+                            records=taken.messages,
+                            columns=MESSAGE_COLUMNS
+                        )
+                    if taken.server_events:
+                        await conn.copy_records_to_table(
+                            "server_events",
+                            records=taken.server_events,
+                            columns=SERVER_EVENT_COLUMNS
+                        )
+        except RETRYABLE_ERRORS + OVERLOAD_ERRORS as e:
+            logger.warning("Buffered writes failed, retrying on the next flush: %s", e)
+            # Put rows back for the next attempt, without growing past the buffer limit
+            self._dropped_rows += self._writes.restore(taken, WRITE_BUFFER_MAX)
+        except Exception:
+            # A data error would fail the same way every time; don't let it block later writes
+            logger.exception("Error flushing buffered writes, dropping the batch")
+            self._dropped_rows += len(taken)
+
+        if self._dropped_rows:
+            logger.warning("Dropped %d buffered rows", self._dropped_rows)
+            self._dropped_rows = 0
+
+    async def _flush_usage(self):
+        """Upsert the accumulated usage counters, one row per (user_id, provider)"""
+        self._usage_flushed_at = time.monotonic()
+        if not self._usage_accum or not self.pool:
+            return
+
+        taken, self._usage_accum = self._usage_accum, defaultdict(lambda: [0, 0, 0.0])
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.executemany(
+                    SQL_MERGE_USAGE,
+                    [(user_id, provider, *counts) for (user_id, provider), counts in taken.items()]
+                )
+        except Exception:
+            logger.exception("Error flushing usage stats")
+            # Fold the counters back in for the next attempt
+            for key, (requests, tokens, cost_usd) in taken.items():
+                counts = self._usage_accum[key]
+                counts[0] += requests
+                counts[1] += tokens
+                counts[2] += cost_usd
+
     async def _create_tables(self):
         """Create tables if they don't exist"""
         async with self.pool.acquire() as conn:
-            # Chat messages table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS telegram_messages (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    username VARCHAR(255),
-                    message_type VARCHAR(50) NOT NULL,
-                    user_message TEXT NOT NULL,
-                    bot_response TEXT,
-                    provider VARCHAR(50),
-                    model VARCHAR(100),
-                    tokens_used INTEGER,
-                    response_time_ms INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_telegram_messages_user_id
-                ON telegram_messages(user_id);
-
-                CREATE INDEX IF NOT EXISTS idx_telegram_messages_created_at
-                ON telegram_messages(created_at);
-            """)
-
-            # Claude Code sessions table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS claude_sessions (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    session_end TIMESTAMP,
-                    message_count INTEGER DEFAULT 0,
-                    total_cost_usd DECIMAL(10, 4) DEFAULT 0,
-                    working_directory TEXT,
-                    is_active BOOLEAN DEFAULT TRUE
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_claude_sessions_user_id
-                ON claude_sessions(user_id);
-            """)
-
-            # Claude session messages
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS claude_session_messages (
-                    id SERIAL PRIMARY KEY,
-                    session_id INTEGER REFERENCES claude_sessions(id),
-                    role VARCHAR(20) NOT NULL,
-                    content TEXT NOT NULL,
-                    cost_usd DECIMAL(10, 4),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_claude_session_messages_session_id
-                ON claude_session_messages(session_id);
-            """)
-
-            # Usage statistics (daily aggregates)
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS usage_stats (
-                    id SERIAL PRIMARY KEY,
-                    date DATE NOT NULL,
-                    user_id BIGINT NOT NULL,
-                    provider VARCHAR(50) NOT NULL,
-                    request_count INTEGER DEFAULT 0,
-                    total_tokens INTEGER DEFAULT 0,
-                    estimated_cost_usd DECIMAL(10, 4) DEFAULT 0,
-                    UNIQUE(date, user_id, provider)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_usage_stats_date
-                ON usage_stats(date);
-            """)
-
-            # User memory/preferences table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS user_memory (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    memory_type VARCHAR(50) NOT NULL,
-                    key VARCHAR(255) NOT NULL,
-                    value TEXT,
-                    metadata JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id, memory_type, key)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_user_memory_user_id
-                ON user_memory(user_id);
-            """)
-
-            # Server events log
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS server_events (
-                    id SERIAL PRIMARY KEY,
-                    event_type VARCHAR(50) NOT NULL,
-                    severity VARCHAR(20) NOT NULL,
-                    message TEXT NOT NULL,
-                    details JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_server_events_created_at
-                ON server_events(created_at);
-
-                CREATE INDEX IF NOT EXISTS idx_server_events_type
-                ON server_events(event_type);
-            """)
-
-    @with_retry(max_retries=3)
+            await conn.execute(SQL_SCHEMA)
+
+    @db_op(default=-1, retry=False)
     async def log_message(
         self,
+        conn: asyncpg.Connection,
         user_id: int,
         username: str,
         message_type: str,
@@ -208,25 +752,33 @@ class Database:
         response_time_ms: int = None
     ) -> int:
         """Log a chat message to the database"""
+        stmt = await conn.hot_statement(SQL_LOG_MESSAGE)
+        return await stmt.fetchval(
+            user_id, username, message_type, user_message, bot_response,
+            provider, model, tokens_used, response_time_ms
+        )
+
+    def queue_message(
+        self,
+        user_id: int,
+        username: str,
+        message_type: str,
+        user_message: str,
+        bot_response: str = None,
+        provider: str = None,
+        model: str = None,
+        tokens_used: int = None,
+        response_time_ms: int = None
+    ) -> None:
+        """Log a chat message without waiting for it (use log_message if the id is needed)"""
         if not self.pool:
-            return -1
+            return
+
+        self._queue_row(self._writes.messages, (
+            user_id, username, message_type, user_message, bot_response,
+            provider, model, tokens_used, response_time_ms
+        ))
 
-        try:
-            async with self.pool.acquire() as conn:
-                result = await conn.fetchval("""
-                    INSERT INTO telegram_messages
-                    (user_id, username, message_type, user_message, bot_response,
-                     provider, model, tokens_used, response_time_ms)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    RETURNING id
-                """, user_id, username, message_type, user_message, bot_response,
-                    provider, model, tokens_used, response_time_ms)
-                return result
-        except Exception as e:
-            print(f"Error logging message: {e}")
-            return -1
-
-    @with_retry(max_retries=3)
     async def log_server_event(
         self,
         event_type: str,
@@ -234,64 +786,56 @@ class Database:
         message: str,
         details: dict = None
     ):
-        """Log a server event"""
+        """Log a server event (buffered, written on the next flush)"""
         if not self.pool:
             return
 
-        try:
-            async with self.pool.acquire() as conn:
-                import json
-                await conn.execute("""
-                    INSERT INTO server_events (event_type, severity, message, details)
-                    VALUES ($1, $2, $3, $4)
-                """, event_type, severity, message,
-                    json.dumps(details) if details else None)
-        except Exception as e:
-            print(f"Error logging server event: {e}")
-
-    @with_retry(max_retries=3)
-    async def start_claude_session(self, user_id: int, working_dir: str = None) -> int:
-        """Start a new Claude Code session"""
-        if not self.pool:
-            return -1
+        self._queue_row(self._writes.server_events, (
+            event_type, severity, message, details or None
+        ))
 
-        try:
-            async with self.pool.acquire() as conn:
-                # End any active sessions for this user
-                await conn.execute("""
-                    UPDATE claude_sessions
-                    SET is_active = FALSE, session_end = CURRENT_TIMESTAMP
-                    WHERE user_id = $1 AND is_active = TRUE
-                """, user_id)
-
-                # Start new session
-                result = await conn.fetchval("""
-                    INSERT INTO claude_sessions (user_id, working_directory)
-                    VALUES ($1, $2)
-                    RETURNING id
-                """, user_id, working_dir)
-                return result
-        except Exception as e:
-            print(f"Error starting Claude session: {e}")
-            return -1
+    async def start_claude_session(self, user_id: int, working_dir: str = None) -> int:
+        """Start a new Claude Code session, ending any active ones"""
+        session_id = await self._start_claude_session(user_id, working_dir)
+        if session_id >= 0:
+            self._cache_active_session(user_id, session_id)
+        else:
+            self._active_session.pop(user_id, None)
+        return session_id
+
+    @db_op(default=-1, retry=False)
+    async def _start_claude_session(self, conn, user_id, working_dir):
+        return await conn.fetchval(SQL_START_SESSION, user_id, working_dir)
 
     async def get_active_claude_session(self, user_id: int) -> Optional[int]:
-        """Get active Claude session ID for user"""
-        if not self.pool:
-            return None
+        """Get active Claude session ID for user (cached for SESSION_CACHE_TTL)"""
+        cached = self._active_session.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        # One lookup per user at a time; later callers reuse its result
+        async with self._session_locks[user_id]:
+            try:
+                cached = self._active_session.get(user_id)
+                if cached and cached[1] > time.monotonic():
+                    return cached[0]
+
+                session_id = await self._get_active_claude_session(user_id)
+                if session_id == -1:  # Lookup failed, don't cache
+                    return None
+                self._cache_active_session(user_id, session_id)
+                return session_id
+            finally:
+                # Waiters keep their own reference; don't hold a lock per user forever
+                self._session_locks.pop(user_id, None)
+
+    @db_op(default=-1)
+    async def _get_active_claude_session(self, conn, user_id):
+        return await conn.fetchval(SQL_GET_ACTIVE_SESSION, user_id)
+
+    def _cache_active_session(self, user_id: int, session_id: Optional[int]) -> None:
+        self._active_session[user_id] = (session_id, time.monotonic() + SESSION_CACHE_TTL)
 
-        try:
-            async with self.pool.acquire() as conn:
-                return await conn.fetchval("""
-                    SELECT id FROM claude_sessions
-                    WHERE user_id = $1 AND is_active = TRUE
-                    ORDER BY session_start DESC
-                    LIMIT 1
-                """, user_id)
-        except:
-            return None
-
-    @with_retry(max_retries=3)
     async def add_claude_message(
         self,
         session_id: int,
@@ -300,42 +844,26 @@ class Database:
         cost_usd: float = None
     ):
         """Add message to Claude session"""
-        if not self.pool or session_id < 0:
-            return
+        if session_id >= 0:
+            await self._add_claude_message(session_id, role, content, cost_usd)
 
-        try:
-            async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO claude_session_messages (session_id, role, content, cost_usd)
-                    VALUES ($1, $2, $3, $4)
-                """, session_id, role, content, cost_usd)
-
-                # Update session stats
-                await conn.execute("""
-                    UPDATE claude_sessions
-                    SET message_count = message_count + 1,
-                        total_cost_usd = total_cost_usd + COALESCE($2, 0)
-                    WHERE id = $1
-                """, session_id, cost_usd)
-        except Exception as e:
-            print(f"Error adding Claude message: {e}")
+    @db_op(retry=False)
+    async def _add_claude_message(self, conn, session_id, role, content, cost_usd):
+        stmt = await conn.hot_statement(SQL_ADD_CLAUDE_MESSAGE)
+        await stmt.fetch(session_id, role, content, cost_usd)
 
     async def end_claude_session(self, session_id: int):
         """End a Claude session"""
-        if not self.pool or session_id < 0:
-            return
+        if session_id >= 0 and await self._end_claude_session(session_id):
+            for user_id, (cached_id, _) in list(self._active_session.items()):
+                if cached_id == session_id:
+                    self._cache_active_session(user_id, None)
+
+    @db_op(default=False)
+    async def _end_claude_session(self, conn, session_id):
+        await conn.execute(SQL_END_SESSION, session_id)
+        return True
 
-        try:
-            async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    UPDATE claude_sessions
-                    SET is_active = FALSE, session_end = CURRENT_TIMESTAMP
-                    WHERE id = $1
-                """, session_id)
-        except Exception as e:
-            print(f"Error ending Claude session: {e}")
-
-    @with_retry(max_retries=3)
     async def update_usage_stats(
         self,
         user_id: int,
@@ -343,180 +871,97 @@ class Database:
         tokens: int = 0,
         cost_usd: float = 0
     ):
-        """Update daily usage statistics"""
+        """Update daily usage statistics (accumulated, upserted every few seconds)"""
         if not self.pool:
             return
 
-        try:
-            async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO usage_stats (date, user_id, provider, request_count, total_tokens, estimated_cost_usd)
-                    VALUES (CURRENT_DATE, $1, $2, 1, $3, $4)
-                    ON CONFLICT (date, user_id, provider)
-                    DO UPDATE SET
-                        request_count = usage_stats.request_count + 1,
-                        total_tokens = usage_stats.total_tokens + $3,
-                        estimated_cost_usd = usage_stats.estimated_cost_usd + $4
-                """, user_id, provider, tokens, cost_usd)
-        except Exception as e:
-            print(f"Error updating usage stats: {e}")
+        counts = self._usage_accum[(user_id, provider)]
+        counts[0] += 1
+        counts[1] += tokens or 0
+        counts[2] += cost_usd or 0.0
 
+    @db_op(default=dict, acquire=False)
     async def get_user_stats(self, user_id: int, days: int = 7) -> dict:
         """Get usage statistics for a user"""
-        if not self.pool:
-            return {}
+        async def _fetch(sql, *args):
+            async with self.pool.acquire() as conn:
+                return await conn.fetch(sql, *args)
 
-        try:
+        async def _fetchrow(sql, *args):
             async with self.pool.acquire() as conn:
-                # Message counts
-                messages = await conn.fetch("""
-                    SELECT message_type, COUNT(*) as count
-                    FROM telegram_messages
-                    WHERE user_id = $1 AND created_at > CURRENT_DATE - $2
-                    GROUP BY message_type
-                """, user_id, days)
-
-                # Provider usage
-                providers = await conn.fetch("""
-                    SELECT provider, SUM(request_count) as requests,
-                           SUM(total_tokens) as tokens,
-                           SUM(estimated_cost_usd) as cost
-                    FROM usage_stats
-                    WHERE user_id = $1 AND date > CURRENT_DATE - $2
-                    GROUP BY provider
-                """, user_id, days)
-
-                # Claude sessions
-                claude = await conn.fetchrow("""
-                    SELECT COUNT(*) as sessions,
-                           SUM(message_count) as messages,
-                           SUM(total_cost_usd) as cost
-                    FROM claude_sessions
-                    WHERE user_id = $1 AND session_start > CURRENT_DATE - $2
-                """, user_id, days)
-
-                return {
-                    "messages": {r["message_type"]: r["count"] for r in messages},
-                    "providers": {r["provider"]: {
-                        "requests": r["requests"],
-                        "tokens": r["tokens"],
-                        "cost": float(r["cost"] or 0)
-                    } for r in providers},
-                    "claude": {
-                        "sessions": claude["sessions"] if claude else 0,
-                        "messages": claude["messages"] if claude else 0,
-                        "cost": float(claude["cost"] or 0) if claude else 0
-                    }
-                }
-        except Exception as e:
-            print(f"Error getting user stats: {e}")
-            return {}
-
-    async def get_recent_messages(self, user_id: int, limit: int = 20) -> list:
+                return await conn.fetchrow(sql, *args)
+
+        # Independent queries - run them on separate connections concurrently
+        messages, providers, claude = await asyncio.gather(
+            _fetch(SQL_MSG_COUNTS, user_id, days),         # Message counts
+            _fetch(SQL_PROVIDER_USAGE, user_id, days),     # Provider usage
+            _fetchrow(SQL_CLAUDE_SUMMARY, user_id, days),  # Claude sessions
+        )
+
+        return {
+            "messages": {r["message_type"]: r["count"] for r in messages},
+            "providers": {r["provider"]: {
+                "requests": r["requests"],
+                "tokens": r["tokens"],
+                "cost": r["cost"] or 0.0
+            } for r in providers},
+            "claude": {
+                "sessions": claude["sessions"] if claude else 0,
+                "messages": claude["messages"] if claude else 0,
+                "cost": (claude["cost"] or 0.0) if claude else 0
+            }
+        }
+
+    @db_op(default=list)
+    async def get_recent_messages(
+        self,
+        conn: asyncpg.Connection,
+        user_id: int,
+        limit: int = 20
+    ) -> list[asyncpg.Record]:
         """Get recent messages for a user"""
-        if not self.pool:
-            return []
+        # Records support .get()/[] like dicts - no need to copy them
+        return await conn.fetch(SQL_RECENT_MESSAGES, user_id, limit)
 
-        try:
-            async with self.pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT message_type, user_message, bot_response, provider, created_at
-                    FROM telegram_messages
-                    WHERE user_id = $1
-                    ORDER BY created_at DESC
-                    LIMIT $2
-                """, user_id, limit)
-                return [dict(r) for r in rows]
-        except:
-            return []
-
-    async def get_chat_history(self, user_id: int, limit: int = 10) -> list:
-        """Get formatted chat history for display"""
-        if not self.pool:
-            return []
+    def get_chat_history(
+        self,
+        user_id: int,
+        limit: int = 10
+    ) -> AsyncIterator[asyncpg.Record]:
+        """Stream the last `limit` messages for display, oldest first (aclose() when done)"""
+        return self._stream(SQL_CHAT_HISTORY, user_id, limit)
 
-        try:
-            async with self.pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT id, message_type, user_message, bot_response,
-                           provider, response_time_ms, created_at
-                    FROM telegram_messages
-                    WHERE user_id = $1
-                    ORDER BY created_at DESC
-                    LIMIT $2
-                """, user_id, limit)
-                return [dict(r) for r in rows]
-        except Exception as e:
-            print(f"Error getting chat history: {e}")
-            return []
-
-    async def get_message_count(self, user_id: int) -> int:
+    @db_op(default=0)
+    async def get_message_count(self, conn: asyncpg.Connection, user_id: int) -> int:
         """Get total message count for user"""
-        if not self.pool:
-            return 0
+        return await conn.fetchval(SQL_MESSAGE_COUNT, user_id)
 
-        try:
-            async with self.pool.acquire() as conn:
-                return await conn.fetchval("""
-                    SELECT COUNT(*) FROM telegram_messages
-                    WHERE user_id = $1
-                """, user_id)
-        except:
-            return 0
-
-    @with_retry(max_retries=3)
     async def get_claude_session_state(self, user_id: int) -> bool:
         """Check if user has an active Claude session"""
-        if not self.pool:
-            return False
+        return await self.get_active_claude_session(user_id) is not None
 
-        try:
-            async with self.pool.acquire() as conn:
-                result = await conn.fetchval("""
-                    SELECT is_active FROM claude_sessions
-                    WHERE user_id = $1 AND is_active = TRUE
-                    ORDER BY session_start DESC
-                    LIMIT 1
-                """, user_id)
-                return bool(result)
-        except Exception as e:
-            print(f"Error getting claude session state: {e}")
-            return False
-
-    @with_retry(max_retries=3)
-    async def set_claude_session_active(self, user_id: int, active: bool) -> bool:
+    @db_op(default=False, retry=False)
+    async def set_claude_session_active(
+        self,
+        conn: asyncpg.Connection,
+        user_id: int,
+        active: bool
+    ) -> bool:
         """Set Claude session state for a user"""
-        if not self.pool:
-            return False
-
-        try:
-            async with self.pool.acquire() as conn:
-                if active:
-                    existing = await conn.fetchval("""
-                        SELECT id FROM claude_sessions
-                        WHERE user_id = $1 AND is_active = TRUE
-                    """, user_id)
-
-                    if not existing:
-                        await conn.execute("""
-                            INSERT INTO claude_sessions (user_id, is_active)
-                            VALUES ($1, TRUE)
-                        """, user_id)
-                else:
-                    await conn.execute("""
-                        UPDATE claude_sessions
-                        SET is_active = FALSE, session_end = CURRENT_TIMESTAMP
-                        WHERE user_id = $1 AND is_active = TRUE
-                    """, user_id)
-                return True
-        except Exception as e:
-            print(f"Error setting claude session state: {e}")
-            return False
+        if active:
+            await conn.execute(SQL_INSERT_ACTIVE_SESSION, user_id)
+            # Session id isn't returned, so look it up again on next read
+            self._active_session.pop(user_id, None)
+        else:
+            await conn.execute(SQL_END_ACTIVE_SESSIONS, user_id)
+            self._cache_active_session(user_id, None)
+        return True
 
     # User Memory Methods
-    @with_retry(max_retries=3)
+    @db_op()
     async def set_user_memory(
         self,
+        conn: asyncpg.Connection,
         user_id: int,
         memory_type: str,
         key: str,
@@ -524,81 +969,41 @@ class Database:
         metadata: dict = None
     ):
         """Store a user memory/preference"""
-        if not self.pool:
-            return
-
-        try:
-            async with self.pool.acquire() as conn:
-                import json
-                await conn.execute("""
-                    INSERT INTO user_memory (user_id, memory_type, key, value, metadata)
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (user_id, memory_type, key)
-                    DO UPDATE SET
-                        value = $4,
-                        metadata = $5,
-                        updated_at = CURRENT_TIMESTAMP
-                """, user_id, memory_type, key, value,
-                    json.dumps(metadata) if metadata else None)
-        except Exception as e:
-            print(f"Error setting user memory: {e}")
+        await conn.execute(
+            SQL_SET_USER_MEMORY,
+            user_id, memory_type, key, value, metadata or None
+        )
 
+    @db_op(default=list)
     async def get_user_memory(
         self,
+        conn: asyncpg.Connection,
         user_id: int,
         memory_type: str = None,
         key: str = None
     ) -> list:
         """Get user memories, optionally filtered"""
-        if not self.pool:
-            return []
-
-        try:
-            async with self.pool.acquire() as conn:
-                if memory_type and key:
-                    rows = await conn.fetch("""
-                        SELECT * FROM user_memory
-                        WHERE user_id = $1 AND memory_type = $2 AND key = $3
-                    """, user_id, memory_type, key)
-                elif memory_type:
-                    rows = await conn.fetch("""
-                        SELECT * FROM user_memory
-                        WHERE user_id = $1 AND memory_type = $2
-                    """, user_id, memory_type)
-                else:
-                    rows = await conn.fetch("""
-                        SELECT * FROM user_memory
-                        WHERE user_id = $1
-                    """, user_id)
-                return [dict(r) for r in rows]
-        except Exception as e:
-            print(f"Error getting user memory: {e}")
-            return []
-
-    async def get_recent_server_events(self, limit: int = 50, event_type: str = None) -> list:
-        """Get recent server events"""
-        if not self.pool:
-            return []
-
-        try:
-            async with self.pool.acquire() as conn:
-                if event_type:
-                    rows = await conn.fetch("""
-                        SELECT * FROM server_events
-                        WHERE event_type = $1
-                        ORDER BY created_at DESC
-                        LIMIT $2
-                    """, event_type, limit)
-                else:
-                    rows = await conn.fetch("""
-                        SELECT * FROM server_events
-                        ORDER BY created_at DESC
-                        LIMIT $1
-                    """, limit)
-                return [dict(r) for r in rows]
-        except Exception as e:
-            print(f"Error getting server events: {e}")
-            return []
+        if memory_type and key:
+            rows = await conn.fetch(SQL_USER_MEMORY_BY_KEY, user_id, memory_type, key)
+        elif memory_type:
+            rows = await conn.fetch(SQL_USER_MEMORY_BY_TYPE, user_id, memory_type)
+        else:
+            rows = await conn.fetch(SQL_USER_MEMORY, user_id)
+        return [dict(r) for r in rows]
+
+    @db_op(default=list)
+    async def get_recent_server_events(
+        self,
+        conn: asyncpg.Connection,
+        limit: int = 50,
+        event_type: str = None
+    ) -> list:
+        """Get recent server events, newest first"""
+        if event_type:
+            rows = await conn.fetch(SQL_SERVER_EVENTS_BY_TYPE, event_type, limit)
+        else:
+            rows = await conn.fetch(SQL_SERVER_EVENTS, limit)
+        return [dict(r) for r in rows]
 
 
 # Global database instance
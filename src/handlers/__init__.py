@@ -2,64 +2,64 @@
 Handlers Module
 
 Exports all handler functions for the Telegram bot.
-"""
-
-from .commands import (
-    cmd_help, cmd_ping, cmd_status, cmd_gpu, cmd_disk, cmd_memory,
-    cmd_cpu, cmd_uptime, cmd_processes, cmd_ip, cmd_services,
-    cmd_start, cmd_stop, cmd_restart, cmd_logs, cmd_docker,
-    cmd_monitoring, cmd_alert, cmd_conda, cmd_ollama, cmd_llm,
-    cmd_confirm, cmd_reboot, cmd_shutdown, cmd_kill,
-    cmd_history, cmd_stats, cmd_screenshot, cmd_chart, cmd_schedule
-)
-
-from .llm import handle_message
-
-from .claude import handle_claude_command
-
-from .email import email_conversation_handler
 
-from .files import (
-    cmd_download, cmd_ls, cmd_cat,
-    file_upload_handler
-)
-
-from .keyboard import cmd_menu, callback_handler
+Submodules are imported on first attribute access so that loading one
+handler (e.g. handlers.email) doesn't pull in the LLM, Claude and chart
+dependencies of all the others.
+"""
 
-from .memory_cmd import (
-    cmd_memory_view, cmd_memory_add, cmd_memory_delete,
-    cmd_server_logs, cmd_proactive_status, cmd_insights,
-    cmd_hafiza, cmd_hafiza_ekle, cmd_hafiza_sil,
-    cmd_sunucu_log, cmd_proaktif
-)
+import importlib
 
-__all__ = [
+# Exported name -> submodule that defines it
+_EXPORTS = {
     # Command handlers
-    'cmd_help', 'cmd_ping', 'cmd_status', 'cmd_gpu', 'cmd_disk', 'cmd_memory',
-    'cmd_cpu', 'cmd_uptime', 'cmd_processes', 'cmd_ip', 'cmd_services',
-    'cmd_start', 'cmd_stop', 'cmd_restart', 'cmd_logs', 'cmd_docker',
-    'cmd_monitoring', 'cmd_alert', 'cmd_conda', 'cmd_ollama', 'cmd_llm',
-    'cmd_confirm', 'cmd_reboot', 'cmd_shutdown', 'cmd_kill',
-    'cmd_history', 'cmd_stats', 'cmd_screenshot', 'cmd_chart', 'cmd_schedule',
+    'cmd_help': '.commands', 'cmd_ping': '.commands', 'cmd_status': '.commands',
+    'cmd_gpu': '.commands', 'cmd_disk': '.commands', 'cmd_memory': '.commands',
+    'cmd_cpu': '.commands', 'cmd_uptime': '.commands', 'cmd_processes': '.commands',
+    'cmd_ip': '.commands', 'cmd_services': '.commands',
+    'cmd_start': '.commands', 'cmd_stop': '.commands', 'cmd_restart': '.commands',
+    'cmd_logs': '.commands', 'cmd_docker': '.commands',
+    'cmd_monitoring': '.commands', 'cmd_alert': '.commands', 'cmd_conda': '.commands',
+    'cmd_ollama': '.commands', 'cmd_llm': '.commands',
+    'cmd_confirm': '.commands', 'cmd_reboot': '.commands', 'cmd_shutdown': '.commands',
+    'cmd_kill': '.commands',
+    'cmd_history': '.commands', 'cmd_stats': '.commands', 'cmd_screenshot': '.commands',
+    'cmd_chart': '.commands', 'cmd_schedule': '.commands',
 
     # LLM handler
-    'handle_message',
+    'handle_message': '.llm',
 
     # Claude handler
-    'handle_claude_command',
+    'handle_claude_command': '.claude',
 
     # Email handler
-    'email_conversation_handler',
+    'email_conversation_handler': '.email',
 
     # File handlers
-    'cmd_download', 'cmd_ls', 'cmd_cat', 'file_upload_handler',
+    'cmd_download': '.files', 'cmd_ls': '.files', 'cmd_cat': '.files',
+    'file_upload_handler': '.files',
 
     # Keyboard handlers
-    'cmd_menu', 'callback_handler',
+    'cmd_menu': '.keyboard', 'callback_handler': '.keyboard',
 
     # Memory handlers
-    'cmd_memory_view', 'cmd_memory_add', 'cmd_memory_delete',
-    'cmd_server_logs', 'cmd_proactive_status', 'cmd_insights',
-    'cmd_hafiza', 'cmd_hafiza_ekle', 'cmd_hafiza_sil',
-    'cmd_sunucu_log', 'cmd_proaktif'
-]
+    'cmd_memory_view': '.memory_cmd', 'cmd_memory_add': '.memory_cmd',
+    'cmd_memory_delete': '.memory_cmd',
+    'cmd_server_logs': '.memory_cmd', 'cmd_proactive_status': '.memory_cmd',
+    'cmd_insights': '.memory_cmd',
+    'cmd_hafiza': '.memory_cmd', 'cmd_hafiza_ekle': '.memory_cmd',
+    'cmd_hafiza_sil': '.memory_cmd',
+    'cmd_sunucu_log': '.memory_cmd', 'cmd_proaktif': '.memory_cmd',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """Import the defining submodule on first access"""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
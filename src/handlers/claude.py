@@ -6,14 +6,19 @@ Supports session continuity with -c flag.
 """
 
 import asyncio
+import atexit
+import codecs
+import contextlib
 import json
 import logging
 import os
-import tempfile
+import subprocess
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import AsyncIterator, Optional
 
+from cachetools import TTLCache
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -23,29 +28,227 @@ from db import db
 
 logger = logging.getLogger(__name__)
 
+# orjson is optional - parses the stream-json lines straight from bytes
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# Both accept bytes; orjson.JSONDecodeError subclasses json.JSONDecodeError
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+READ_CHUNK_SIZE = 65536
+
+# Minimum seconds between progress edits while Claude is streaming
+PROGRESS_EDIT_INTERVAL = 0.8
+
+# Per-user has_session cache bounds; the DB stays the source of truth
+SESSION_CACHE_SIZE = 10_000
+SESSION_CACHE_TTL = 3600
+
+
+async def _pipe_chunks(fd: int) -> AsyncIterator[bytes]:
+    """
+    Yield raw chunks from a non-blocking pipe fd until EOF.
+
+    Reads with os.read from an event loop reader callback, skipping the
+    subprocess transport and StreamReader copies. The caller owns the fd and
+    must remove the reader and close it when done.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def _on_readable():
+        try:
+            data = os.read(fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            loop.remove_reader(fd)
+        queue.put_nowait(data)
+
+    loop.add_reader(fd, _on_readable)
+    while chunk := await queue.get():
+        yield chunk
+
+
+async def _read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield non-empty lines from a stream of byte chunks"""
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for raw in lines:
+            if raw:
+                yield raw
+    if tail:
+        yield tail
+
+
+def _user_message_line(prompt: str) -> bytes:
+    """Frame a prompt as one stream-json user message line"""
+    message = {
+        "type": "user",
+        "message": {"role": "user", "content": [{"type": "text", "text": prompt}]},
+    }
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message) + b"\n"
+    return json.dumps(message).encode() + b"\n"
+
+
+class _ChildProcess:
+    """
+    A Popen child reaped through a pidfd on the event loop.
+
+    Replaces asyncio.create_subprocess_exec: no subprocess transport and no
+    child watcher thread per process (which would sit idle for the whole
+    life of a persistent CLI). Falls back to a waiter thread without pidfd.
+    """
+
+    def __init__(self, popen: subprocess.Popen):
+        self.popen = popen
+        self.pid = popen.pid
+        loop = asyncio.get_running_loop()
+        self._exited = loop.create_future()
+        try:
+            pidfd = os.pidfd_open(self.pid)
+        except (AttributeError, OSError):
+            waiter = loop.run_in_executor(None, popen.wait)
+            waiter.add_done_callback(lambda _: self._set_exited())
+        else:
+            loop.add_reader(pidfd, self._on_pidfd, loop, pidfd)
+
+    def _on_pidfd(self, loop: asyncio.AbstractEventLoop, pidfd: int) -> None:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+        self.popen.poll()  # Reap
+        self._set_exited()
+
+    def _set_exited(self) -> None:
+        if not self._exited.done():
+            self._exited.set_result(self.popen.returncode)
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self.popen.returncode
+
+    def terminate(self) -> None:
+        # Popen polls first, so an already-reaped pid is never signalled
+        self.popen.terminate()
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+
+class _CLIProcess:
+    """A running claude CLI and the line reader over its stdout"""
+
+    def __init__(self, process: _ChildProcess, stdout_fd: int, stderr_fd: int):
+        self.process = process
+        self.stdout_fd = stdout_fd
+        self.stderr_fd = stderr_fd
+        self.lines = _read_lines(_pipe_chunks(stdout_fd))
+        # Only needed for non-JSON lines; JSON is parsed from bytes
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.flags: list[str] = []  # Flags a persistent CLI was started with
+        self.busy = False  # A run_prompt is reading from it
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def write(self, data: bytes) -> None:
+        """Send data to stdin (prompts are far below the pipe buffer size)"""
+        self.process.popen.stdin.write(data)
+        self.process.popen.stdin.flush()
+
+    async def read_stderr(self) -> bytes:
+        """Read stderr until the process closes it"""
+        data = b"".join([chunk async for chunk in _pipe_chunks(self.stderr_fd)])
+        asyncio.get_running_loop().remove_reader(self.stderr_fd)
+        return data
+
+    def close(self) -> None:
+        """Stop reading, close our pipe ends and terminate the process"""
+        if self.busy:
+            # The reading run_prompt sees EOF and closes it from its finally
+            self.terminate()
+            return
+        if self.stdout_fd < 0:
+            return
+        loop = asyncio.get_running_loop()
+        for fd in (self.stdout_fd, self.stderr_fd):
+            loop.remove_reader(fd)
+            os.close(fd)
+        self.stdout_fd = self.stderr_fd = -1
+        if self.process.popen.stdin:
+            self.process.popen.stdin.close()
+        self.terminate()
+
+    def terminate(self) -> None:
+        if self.alive:
+            try:
+                self.process.terminate()
+            except ProcessLookupError:
+                pass
+
 
 class ClaudeCodeRunner:
     """Runs Claude CLI in non-interactive mode with session support"""
 
+    # Fixed argv prefixes; each call only appends the prompt and its flags
+    _base_cmd_stream = (
+        "claude",
+        "--model", "opus",  # Use Opus by default
+        "--output-format", "stream-json",
+    )
+    # Long-lived variant: prompts arrive as stream-json user messages on stdin
+    _base_cmd_persistent = (
+        "claude", "-p",
+        "--model", "opus",
+        "--input-format", "stream-json",
+        "--output-format", "stream-json",
+        "--verbose",
+    )
+    _base_cmd_simple = (
+        "claude",
+        "--model", "opus",
+        "--output-format", "text",
+        "--dangerously-skip-permissions",
+    )
+
     def __init__(self, working_dir: str = None):
         self.working_dir = working_dir or str(Path.home())
         self.current_process = None
         self.is_running = False
+        self._run_lock = asyncio.Lock()
+        # user_id -> long-lived CLI (only with config.claude_persistent)
+        self._persistent: dict[int, _CLIProcess] = {}
         # Session state is now stored per-user in database
-        self._session_cache: dict[int, bool] = {}  # user_id -> has_session (memory cache)
+        # user_id -> has_session (bounded memory cache)
+        self._session_cache: TTLCache = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL)
 
     async def has_session(self, user_id: int) -> bool:
         """Check if user has an active session (from DB or cache)"""
-        if user_id in self._session_cache:
-            return self._session_cache[user_id]
+        # One lookup: the entry could expire between a membership test and the read
+        cached = self._session_cache.get(user_id)
+        if cached is not None:
+            return cached
         # Load from DB
         has_sess = await db.get_claude_session_state(user_id)
         self._session_cache[user_id] = has_sess
         return has_sess
 
     async def set_session(self, user_id: int, active: bool) -> None:
-        """Set session state for user (saves to DB)"""
+        """Set session state for user (saves to DB only when it changes)"""
+        prev = self._session_cache.get(user_id)
         self._session_cache[user_id] = active
+        if prev == active:
+            return
         await db.set_claude_session_active(user_id, active)
 
     async def run_prompt(
@@ -57,69 +260,102 @@ class ClaudeCodeRunner:
         allowed_tools: list[str] | None = None,
         bypass_permissions: bool = True,
         continue_session: bool = True,
-        force_new: bool = False
-    ) -> AsyncIterator[str]:
+        force_new: bool = False,
+        has_session: bool | None = None
+    ) -> AsyncIterator[tuple[str, str]]:
         """
         Run Claude CLI with prompt and stream response.
         Uses --output-format stream-json for real-time output.
 
+        Yields (kind, value) events: ("text", chunk) as text arrives and
+        ("cost", "$0.0123") once the run completes.
+
         Args:
             user_id: Telegram user ID for session tracking
             continue_session: If True and has_session, use -c to continue
             force_new: If True, start fresh session (ignore continue)
+            has_session: Session state if the caller already looked it up
         """
-        cmd = [
-            "claude", "-p", prompt,
-            "--model", "opus",  # Use Opus by default
-            "--output-format", "stream-json",
-            "--max-budget-usd", str(max_budget)
-        ]
+        # One run at a time: current_process/is_running describe a single
+        # run, and a second concurrent caller would orphan the first process
+        async with self._run_lock:
+            events = self._run_prompt(
+                prompt, user_id, timeout, max_budget, allowed_tools,
+                bypass_permissions, continue_session, force_new, has_session
+            )
+            try:
+                async for event in events:
+                    yield event
+            finally:
+                await events.aclose()
 
-        # Continue previous session if available (unless force_new)
-        user_has_session = await self.has_session(user_id)
-        if continue_session and user_has_session and not force_new:
-            cmd.append("-c")
+    async def _run_prompt(
+        self,
+        prompt, user_id, timeout, max_budget, allowed_tools,
+        bypass_permissions, continue_session, force_new, has_session
+    ) -> AsyncIterator[tuple[str, str]]:
+        flags = ["--max-budget-usd", str(max_budget)]
 
         if bypass_permissions:
             # Skip all permission checks - required for non-interactive Telegram usage
-            cmd.append("--dangerously-skip-permissions")
-            cmd.extend(["--permission-mode", "bypassPermissions"])
+            flags.append("--dangerously-skip-permissions")
 
         if allowed_tools:
-            cmd.extend(["--allowedTools", ",".join(allowed_tools)])
+            flags.extend(["--allowedTools", ",".join(allowed_tools)])
 
-        logger.info(f"Starting Claude CLI: {' '.join(cmd[:5])}...")
+        # Continue previous session if available (unless force_new)
+        resume = False
+        if continue_session and not force_new:
+            if has_session is None:
+                has_session = await self.has_session(user_id)
+            resume = bool(has_session)
+
+        if config.claude_persistent:
+            cli = await self._persistent_cli(user_id, flags, resume)
+            cli.write(_user_message_line(prompt))
+        else:
+            cmd = [*self._base_cmd_stream, "-p", prompt, *flags]
+            if resume:
+                cmd.append("-c")
+            logger.info(f"Starting Claude CLI: {' '.join(cmd[:5])}...")
+            cli = await self._spawn(cmd)
 
-        self.current_process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=self.working_dir
-        )
+        self.current_process = cli.process
         self.is_running = True
+        cli.busy = True
+
+        # One inactivity watchdog for the whole run: lines just bump
+        # last_activity, and the timer re-arms itself until output stalls
+        loop = asyncio.get_running_loop()
+        process = cli.process
+        last_activity = loop.time()
+        timed_out = False
+        completed = False
+
+        def _watchdog():
+            nonlocal timed_out, watchdog
+            idle = loop.time() - last_activity
+            if idle < timeout:
+                watchdog = loop.call_later(timeout - idle, _watchdog)
+                return
+            timed_out = True
+            try:
+                process.terminate()
+            except ProcessLookupError:
+                pass
+
+        watchdog = loop.call_later(timeout, _watchdog)
 
         try:
-            buffer = ""
             has_output = False
-            while True:
-                try:
-                    line = await asyncio.wait_for(
-                        self.current_process.stdout.readline(),
-                        timeout=timeout
-                    )
-                except asyncio.TimeoutError:
-                    yield "\n\nTimeout - operation took too long"
-                    break
-
-                if not line:
-                    break
-
-                line_str = line.decode('utf-8').strip()
-                if not line_str:
+            async for line in cli.lines:
+                last_activity = loop.time()
+
+                if line.isspace():
                     continue
 
                 try:
-                    data = json.loads(line_str)
+                    data = _json_loads(line)
                     msg_type = data.get("type", "")
 
                     # Handle different message types
@@ -128,87 +364,128 @@ class ClaudeCodeRunner:
                         content = data.get("message", {}).get("content", [])
                         for block in content:
                             if block.get("type") == "text":
-                                text = block.get("text", "")
-                                buffer += text
                                 has_output = True
-                                if len(buffer) >= 500:
-                                    yield buffer
-                                    buffer = ""
+                                yield ("text", block.get("text", ""))
 
                     elif msg_type == "content_block_delta":
                         # Streaming delta
                         delta = data.get("delta", {})
                         if delta.get("type") == "text_delta":
-                            text = delta.get("text", "")
-                            buffer += text
                             has_output = True
-                            if len(buffer) >= 500:
-                                yield buffer
-                                buffer = ""
+                            yield ("text", delta.get("text", ""))
 
                     elif msg_type == "result":
                         # Final result
                         has_output = True
-                        if buffer:
-                            yield buffer
-                            buffer = ""
+                        completed = True
 
                         # Include cost info if available
                         cost = data.get("total_cost_usd")
                         if cost:
-                            yield f"\n\n[Cost: ${cost:.4f}]"
+                            yield ("cost", f"${cost:.4f}")
                             logger.info(f"Claude completed, cost: ${cost:.4f}")
                         break
 
                 except json.JSONDecodeError:
                     # Plain text output
-                    buffer += line_str + "\n"
                     has_output = True
-                    if len(buffer) >= 500:
-                        yield buffer
-                        buffer = ""
+                    yield ("text", cli.decoder.decode(line).rstrip() + "\n")
 
-            # Yield remaining buffer
-            if buffer:
-                yield buffer
+            if timed_out:
+                yield ("text", "\n\nTimeout - operation took too long")
 
             # Check stderr if no output was received
             if not has_output:
-                stderr_data = await self.current_process.stderr.read()
+                stderr_data = await cli.read_stderr()
                 if stderr_data:
-                    stderr_text = stderr_data.decode('utf-8').strip()
+                    stderr_text = stderr_data.decode('utf-8', errors='replace').strip()
                     logger.error(f"Claude CLI stderr: {stderr_text}")
-                    yield f"Error: {stderr_text[:500]}"
+                    yield ("text", f"Error: {stderr_text[:500]}")
                 else:
                     logger.warning("Claude CLI returned no output")
-                    yield "No response from Claude. Please try again."
+                    yield ("text", "No response from Claude. Please try again.")
 
             # Mark that we now have a session for future -c usage
             if has_output:
                 await self.set_session(user_id, True)
 
         finally:
+            watchdog.cancel()
             self.is_running = False
-            if self.current_process:
-                try:
-                    self.current_process.terminate()
-                except:
-                    pass
+            cli.busy = False
+            # A persistent CLI that finished its turn cleanly stays up for the
+            # next prompt; anything else is torn down
+            if not (completed and self._persistent.get(user_id) is cli):
+                if self._persistent.get(user_id) is cli:
+                    del self._persistent[user_id]
+                cli.close()
+
+    async def _spawn(self, cmd: list[str], stdin=None) -> "_CLIProcess":
+        """Start the CLI with stdout/stderr on raw pipes (read via _pipe_chunks)"""
+        stdout_fd, child_stdout = os.pipe()
+        stderr_fd, child_stderr = os.pipe()
+        os.set_blocking(stdout_fd, False)
+        os.set_blocking(stderr_fd, False)
+        try:
+            # Popen uses vfork+exec on Linux; unlike os.posix_spawn it supports cwd
+            popen = subprocess.Popen(
+                cmd,
+                stdin=stdin,
+                stdout=child_stdout,
+                stderr=child_stderr,
+                cwd=self.working_dir,
+                bufsize=0
+            )
+        except BaseException:
+            os.close(stdout_fd)
+            os.close(stderr_fd)
+            raise
+        finally:
+            os.close(child_stdout)
+            os.close(child_stderr)
+        return _CLIProcess(_ChildProcess(popen), stdout_fd, stderr_fd)
+
+    async def _persistent_cli(self, user_id: int, flags: list[str], resume: bool) -> "_CLIProcess":
+        """
+        Return the user's long-lived CLI, starting one if needed.
+
+        The process holds the conversation itself, so a new session (or
+        different flags) means replacing it; -c only matters on first start.
+        """
+        cli = self._persistent.get(user_id)
+        if cli and cli.alive and resume and cli.flags == flags:
+            return cli
+
+        if cli:
+            del self._persistent[user_id]
+            cli.close()
+
+        cmd = [*self._base_cmd_persistent, *flags]
+        if resume:
+            cmd.append("-c")
+        logger.info(f"Starting persistent Claude CLI for user {user_id}")
+        cli = await self._spawn(cmd, stdin=subprocess.PIPE)
+        cli.flags = flags
+        self._persistent[user_id] = cli
+        return cli
+
+    def close_persistent(self, user_id: int = None) -> None:
+        """Stop one user's persistent CLI, or all of them"""
+        user_ids = [user_id] if user_id is not None else list(self._persistent)
+        for uid in user_ids:
+            cli = self._persistent.pop(uid, None)
+            if cli:
+                cli.close()
 
     async def reset_session(self, user_id: int) -> None:
         """Reset session state for user (for /claude new)"""
+        self.close_persistent(user_id)
         self._session_cache[user_id] = False
         await db.set_claude_session_active(user_id, False)
 
     async def run_simple(self, prompt: str, timeout: int = 120) -> str:
         """Run simple prompt and return full response"""
-        cmd = [
-            "claude", "-p", prompt,
-            "--model", "opus",  # Use Opus by default
-            "--output-format", "text",
-            "--dangerously-skip-permissions",
-            "--permission-mode", "bypassPermissions"
-        ]
+        cmd = [*self._base_cmd_simple, "-p", prompt]
 
         try:
             result = await asyncio.create_subprocess_exec(
@@ -240,9 +517,22 @@ class ClaudeCodeRunner:
                 pass
         return False
 
+    def kill_all(self) -> None:
+        """SIGKILL every CLI we started (last resort at interpreter exit)"""
+        processes = [cli.process for cli in self._persistent.values()]
+        if self.current_process:
+            processes.append(self.current_process)
+        for process in processes:
+            if process.returncode is None:
+                try:
+                    process.popen.kill()
+                except ProcessLookupError:
+                    pass
+
 
 # Global runner instance - uses workspace from config
 claude_runner = ClaudeCodeRunner(working_dir=config.working_dir)
+atexit.register(claude_runner.kill_all)
 
 
 def split_message(text: str, max_length: int = 4000) -> list[str]:
@@ -251,30 +541,30 @@ def split_message(text: str, max_length: int = 4000) -> list[str]:
         return [text]
 
     chunks = []
-    current_chunk = ""
-
-    # Try to split on newlines first
-    lines = text.split('\n')
-
-    for line in lines:
-        # If single line is too long, split by words
-        if len(line) > max_length:
-            words = line.split(' ')
-            for word in words:
-                if len(current_chunk) + len(word) + 1 > max_length:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = word + ' '
-                else:
-                    current_chunk += word + ' '
-        elif len(current_chunk) + len(line) + 1 > max_length:
-            chunks.append(current_chunk.strip())
-            current_chunk = line + '\n'
+    i = 0
+    n = len(text)
+
+    # Single pass: cut at the last newline, else last space, else hard cut
+    while i < n:
+        end = i + max_length
+        if end >= n:
+            chunk = text[i:].strip()
+            if chunk:
+                chunks.append(chunk)
+            break
+
+        cut = text.rfind('\n', i, end)
+        if cut <= i:
+            cut = text.rfind(' ', i, end)
+        if cut <= i:
+            cut, skip = end, 0
         else:
-            current_chunk += line + '\n'
+            skip = 1  # Drop the separator we split on
 
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+        chunk = text[i:cut].strip()
+        if chunk:
+            chunks.append(chunk)
+        i = cut + skip
 
     return chunks
 
@@ -282,53 +572,82 @@ def split_message(text: str, max_length: int = 4000) -> list[str]:
 async def send_long_message(update: Update, progress_msg, response: str):
     """Send response, splitting into multiple messages if needed"""
     MAX_LENGTH = 4000  # Leave some margin
+    HEADER = "Claude Code"
+    SINGLE_PREFIX = f"{HEADER}:\n\n"
+    CHUNK_LENGTH = MAX_LENGTH - 50  # Leave room for headers
 
-    # Add Claude header
-    full_response = f"Claude Code:\n\n{response}"
-
-    if len(full_response) <= MAX_LENGTH:
+    # Fits in one message: only then build the headed copy
+    if len(response) <= MAX_LENGTH - len(SINGLE_PREFIX):
+        full_response = SINGLE_PREFIX + response
         try:
-            await progress_msg.edit_text(full_response)
+            await progress_msg.edit_text(full_response, disable_web_page_preview=True)
         except:
-            await update.message.reply_text(full_response)
+            await update.message.reply_text(full_response, disable_web_page_preview=True)
         return
 
     # Split into chunks
-    chunks = split_message(response, MAX_LENGTH - 50)  # Leave room for headers
+    chunks = split_message(response, CHUNK_LENGTH)
+    total = len(chunks)
 
     # Edit progress message with first chunk
+    first = f"{HEADER} (1/{total}):\n\n{chunks[0]}"
     try:
-        header = f"Claude Code (1/{len(chunks)}):\n\n"
-        await progress_msg.edit_text(header + chunks[0])
+        await progress_msg.edit_text(first, disable_web_page_preview=True)
     except:
-        await update.message.reply_text(f"Claude Code (1/{len(chunks)}):\n\n{chunks[0]}")
+        await update.message.reply_text(first, disable_web_page_preview=True)
 
     # Send remaining chunks as new messages
     for i, chunk in enumerate(chunks[1:], start=2):
-        await update.message.reply_text(f"({i}/{len(chunks)}):\n\n{chunk}")
+        await update.message.reply_text(
+            f"({i}/{total}):\n\n{chunk}",
+            disable_web_page_preview=True
+        )
 
     # If total is very long (>15000), also send as file for easy copying
     if len(response) > 15000:
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.txt',
-            delete=False,
-            prefix='claude_'
-        ) as f:
-            f.write(response)
-            temp_path = f.name
-
+        # Upload straight from memory, no temp file
         filename = f"claude_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         await update.message.reply_document(
-            document=open(temp_path, 'rb'),
+            document=response.encode('utf-8'),
             filename=filename,
             caption=f"Full output ({len(response)} chars)"
         )
 
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+
+async def _claude_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/c status - show operation and session state"""
+    user_id = update.effective_user.id
+    running_status = "Running" if claude_runner.is_running else "Idle"
+    user_has_session = await claude_runner.has_session(user_id)
+    session_status = "Active (next message continues)" if user_has_session else "None (will start new)"
+    await update.message.reply_text(
+        f"Claude Code Status:\n\n"
+        f"Operation: {running_status}\n"
+        f"Session: {session_status}"
+    )
+
+
+async def _claude_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/c cancel - stop the running operation"""
+    if await claude_runner.cancel():
+        await update.message.reply_text("Operation cancelled")
+    else:
+        await update.message.reply_text("No running operation")
+
+
+async def _claude_reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/c reset - next message starts a new session"""
+    user_id = update.effective_user.id
+    await claude_runner.reset_session(user_id)
+    await update.message.reply_text("Session reset. Next message will start new session.")
+
+
+# Keyword subcommands of /claude, matched case-insensitively on the whole message
+CLAUDE_SUBCOMMANDS = {
+    "status": _claude_status,
+    "cancel": _claude_cancel,
+    "reset": _claude_reset,
+}
 
 
 @require_auth
@@ -364,42 +683,21 @@ async def handle_claude_command(update: Update, context: ContextTypes.DEFAULT_TY
         return
 
     message = " ".join(args)
+    lowered = message.lower()
     force_new = False
 
     # Check for "new" prefix
-    if message.lower().startswith("new "):
+    if lowered.startswith("new "):
         force_new = True
         message = message[4:].strip()
         if not message:
             await update.message.reply_text("Usage: /c new <message>")
             return
+        lowered = message.lower()
 
-    # Status check
-    if message.lower() == "status":
-        user_id = update.effective_user.id
-        running_status = "Running" if claude_runner.is_running else "Idle"
-        user_has_session = await claude_runner.has_session(user_id)
-        session_status = "Active (next message continues)" if user_has_session else "None (will start new)"
-        await update.message.reply_text(
-            f"Claude Code Status:\n\n"
-            f"Operation: {running_status}\n"
-            f"Session: {session_status}"
-        )
-        return
-
-    # Cancel
-    if message.lower() == "cancel":
-        if await claude_runner.cancel():
-            await update.message.reply_text("Operation cancelled")
-        else:
-            await update.message.reply_text("No running operation")
-        return
-
-    # Reset session
-    if message.lower() == "reset":
-        user_id = update.effective_user.id
-        await claude_runner.reset_session(user_id)
-        await update.message.reply_text("Session reset. Next message will start new session.")
+    handler = CLAUDE_SUBCOMMANDS.get(lowered)
+    if handler:
+        await handler(update, context)
         return
 
     # Check if already running
@@ -418,29 +716,61 @@ async def handle_claude_command(update: Update, context: ContextTypes.DEFAULT_TY
     logger.info(f"Claude command from user {user_id}: {message[:50]}... {session_info}")
     progress_msg = await update.message.reply_text(f"Claude working... {session_info}")
 
-    full_response = ""
-    last_update_len = 0
+    response_parts: list[str] = []
+    preview_chars = deque(maxlen=2000)  # Tail of the response for progress edits
+    pending_edit: Optional[asyncio.Task] = None
+
+    async def _cancel_edit():
+        # Wait for the cancelled edit so it can't land after the final message
+        task = pending_edit  # _flush_edit clears pending_edit as it exits
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _flush_edit():
+        # Coalesce: whatever arrived during the delay goes out in one edit
+        nonlocal pending_edit
+        try:
+            await asyncio.sleep(PROGRESS_EDIT_INTERVAL)
+            await progress_msg.edit_text(
+                f"Working... {session_info}\n\n{''.join(preview_chars)}",
+                disable_web_page_preview=True
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            pending_edit = None
 
     try:
-        async for chunk in claude_runner.run_prompt(message, user_id=user_id, force_new=force_new):
-            full_response += chunk
+        async for kind, value in claude_runner.run_prompt(
+            message,
+            user_id=user_id,
+            force_new=force_new,
+            has_session=user_has_session
+        ):
+            if kind == "cost":
+                response_parts.append(f"\n\n[Cost: {value}]")
+                continue
 
-            # Update message every 1000 chars
-            if len(full_response) - last_update_len >= 1000:
-                preview = full_response[-2000:] if len(full_response) > 2000 else full_response
-                try:
-                    await progress_msg.edit_text(
-                        f"Working... {session_info}\n\n{preview}"
-                    )
-                except:
-                    pass
-                last_update_len = len(full_response)
+            response_parts.append(value)
+            preview_chars.extend(value)
+
+            # At most one progress edit per PROGRESS_EDIT_INTERVAL
+            if pending_edit is None:
+                pending_edit = asyncio.create_task(_flush_edit())
+
+        await _cancel_edit()
 
         # Send final response
+        full_response = "".join(response_parts)
         logger.info(f"Claude response length: {len(full_response)} chars")
         await send_long_message(update, progress_msg, full_response)
 
     except Exception as e:
+        await _cancel_edit()
         logger.error(f"Claude command error: {str(e)}", exc_info=True)
         try:
             await progress_msg.edit_text(f"Error: {str(e)}")
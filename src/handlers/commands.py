@@ -4,14 +4,17 @@ Command Handlers
 Implements all regex-based commands (no LLM needed).
 """
 
+import asyncio
+import io
 import time
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Any, Callable, Coroutine
 
 from telegram import Update
+from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from security import require_auth, require_admin, request_dangerous_confirmation, handle_confirm
+from security import check_auth, check_admin, request_dangerous_confirmation, handle_confirm
 from db import db
 
 # Type alias for command handler functions
@@ -21,47 +24,66 @@ CommandHandler = Callable[
 ]
 
 
-def log_command(func: CommandHandler) -> CommandHandler:
-    """Decorator to log command execution to database"""
-    @wraps(func)
-    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        start_time = time.time()
-        user = update.effective_user
+def command(admin: bool = False) -> Callable[[CommandHandler], CommandHandler]:
+    """
+    Decorator for command handlers: whitelist/rate-limit (or admin) check
+    and database logging, applied in a single wrapper.
+    """
+    check = check_admin if admin else check_auth
 
-        # Get command text
-        command_text = update.message.text if update.message else ""
+    def decorator(func: CommandHandler) -> CommandHandler:
+        @wraps(func)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            user = update.effective_user
+            if user is None or not await check(update, user.id):
+                return
 
-        # Execute the command
-        result = await func(update, context)
+            start_ns = time.perf_counter_ns()
+            message = update.message
 
-        response_time_ms = int((time.time() - start_time) * 1000)
+            # Get command text
+            command_text = message.text if message else ""
 
-        # Get the response (last message sent)
-        # We'll capture a summary of what was done
-        response_summary = f"Command executed: {func.__name__}"
+            # Execute the command
+            result = await func(update, context)
 
-        # Log to database
-        await db.log_message(
-            user_id=user.id,
-            username=user.username,
-            message_type="command",
-            user_message=command_text,
-            bot_response=response_summary,
-            provider="system",
-            response_time_ms=response_time_ms
-        )
+            response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+
+            # Get the response (last message sent)
+            # We'll capture a summary of what was done
+            response_summary = f"Command executed: {func.__name__}"
+
+            # Log to database
+            db.queue_message(
+                user_id=user.id,
+                username=user.username,
+                message_type="command",
+                user_message=command_text,
+                bot_response=response_summary,
+                provider="system",
+                response_time_ms=response_time_ms
+            )
+
+            return result
+        return wrapper
+    return decorator
 
-        return result
-    return wrapper
+
+def _int_arg(args: list[str] | None, index: int, default: int) -> int:
+    """Parse a positive integer argument, falling back to default"""
+    try:
+        value = int(args[index])
+    except (IndexError, TypeError, ValueError):
+        return default
+    return value if value > 0 else default
 
 
 from tools.system import (
     get_gpu_info, get_disk_usage, get_memory_usage, get_cpu_usage,
     get_uptime, get_network_info, get_processes, get_full_status,
     get_conda_envs, get_ollama_models, run_command,
-    get_disk_percent, get_memory_percent, get_cpu_percent
+    MetricsSnapshot
 )
-from tools.gpu import get_gpu_temperature
 from monitoring.alerting import alert_manager, Alert, AlertLevel
 from monitoring.smart_alerter import smart_alerter, AlertContext, AlertType
 from utils.message_coordinator import message_coordinator
@@ -81,6 +103,43 @@ from tools.screenshot import (
 )
 from llm.router import llm_router
 from monitoring.scheduler import scheduler
+from memory import memory_manager, server_logger
+
+
+# /history body budget; leaves room for the header and truncation note
+# under Telegram's 4096-char message cap
+HISTORY_MAX_CHARS = 3900
+
+# /logs output budget; bytes >= chars, so this also bounds the message length
+LOGS_MAX_BYTES = 3900
+
+# Accepted arguments and subcommand dispatch, built once at import
+GPU_DETAILS = frozenset({"summary", "full", "processes", "memory", "temp"})
+DISK_DETAILS = frozenset({"summary", "full", "large"})
+PROCESS_SORTS = frozenset({"cpu", "memory"})
+
+DOCKER_DISPATCH = {
+    "all": lambda: list_containers(all_containers=True),
+    "stats": get_container_stats,
+    "images": list_images,
+}
+
+MONITORING_DISPATCH = {
+    "start": start_monitoring,
+    "stop": stop_monitoring,
+}
+
+# /schedule enable|disable: (scheduler method, emoji, past-tense verb)
+SCHEDULE_TOGGLES = {
+    "enable": (scheduler.enable_task, "✅", "enabled"),
+    "disable": (scheduler.disable_task, "⛔", "disabled"),
+}
+
+CHART_DISPATCH = {
+    "gpu": (generate_gpu_chart, "🎮 GPU Metrics"),
+    "system": (generate_system_chart, "🖥️ System Overview"),
+    "disk": (generate_disk_chart, "💾 Disk Usage"),
+}
 
 
 HELP_TEXT_1 = """
@@ -176,114 +235,110 @@ Fallback: Ollama → Groq → OpenAI
 Add ---groq or ---openai to force provider.
 """
 
+# Legacy Markdown reads _ [ ` as entity markers (an unmatched _ fails the
+# whole send). The *bold* pairs are intended; everything else is escaped
+# here once instead of on every /help.
+MARKDOWN_LITERALS = str.maketrans({c: "\\" + c for c in "_[`"})
+HELP_PARTS = tuple(text.translate(MARKDOWN_LITERALS) for text in (HELP_TEXT_1, HELP_TEXT_2))
+
 
-@require_auth
-@log_command
+@command()
 async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show help message (split into 2 messages to avoid Telegram limit)"""
-    await update.message.reply_text(HELP_TEXT_1, parse_mode="Markdown")
-    await update.message.reply_text(HELP_TEXT_2, parse_mode="Markdown")
+    # Both parts are labelled (1/2), (2/2), so send them concurrently
+    await asyncio.gather(*(
+        update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN) for text in HELP_PARTS
+    ))
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_ping(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Ping command to check if bot is alive"""
     await update.message.reply_text("Pong! Bot is running.")
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show full system status"""
     status = await get_full_status()
     await update.message.reply_text(status)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_gpu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """GPU information"""
     args = context.args
     detail = args[0] if args else "summary"
 
-    if detail not in ["summary", "full", "processes", "memory", "temp"]:
+    if detail not in GPU_DETAILS:
         detail = "summary"
 
     info = await get_gpu_info(detail)
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_disk(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Disk usage"""
     args = context.args
     detail = args[0] if args else "summary"
 
-    if detail not in ["summary", "full", "large"]:
+    if detail not in DISK_DETAILS:
         detail = "summary"
 
     info = await get_disk_usage(detail)
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_memory(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Memory usage"""
     info = await get_memory_usage()
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_cpu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """CPU usage"""
     info = await get_cpu_usage()
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_uptime(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """System uptime"""
     info = await get_uptime()
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_processes(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Top processes"""
     args = context.args
     sort_by = args[0] if args else "cpu"
 
-    if sort_by not in ["cpu", "memory"]:
+    if sort_by not in PROCESS_SORTS:
         sort_by = "cpu"
 
     info = await get_processes(sort_by)
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_ip(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Network information"""
     info = await get_network_info()
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_services(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all services status"""
     status = await get_all_services_status()
     await update.message.reply_text(status)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Start a service"""
     args = context.args
@@ -296,8 +351,7 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text(msg)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_stop(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Stop a service"""
     args = context.args
@@ -315,8 +369,7 @@ async def cmd_stop(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text(msg)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_restart(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Restart a service"""
     args = context.args
@@ -329,8 +382,7 @@ async def cmd_restart(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     await update.message.reply_text(msg)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_logs(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Get service/container logs"""
     args = context.args
@@ -339,56 +391,33 @@ async def cmd_logs(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     container = args[0]
-    lines = int(args[1]) if len(args) > 1 and args[1].isdigit() else 50
-
-    logs = await get_container_logs(container, lines)
-
-    # Truncate if too long
-    if len(logs) > 4000:
-        logs = logs[-4000:]
-        logs = "...(truncated)\n" + logs
+    lines = _int_arg(args, 1, 50)
 
+    logs = await get_container_logs(container, lines, max_bytes=LOGS_MAX_BYTES)
     await update.message.reply_text(logs)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_docker(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Docker commands"""
     args = context.args
     subcommand = args[0] if args else ""
 
-    if subcommand == "all":
-        info = await list_containers(all_containers=True)
-    elif subcommand == "stats":
-        info = await get_container_stats()
-    elif subcommand == "images":
-        info = await list_images()
-    else:
-        info = await list_containers()
-
+    info = await DOCKER_DISPATCH.get(subcommand, list_containers)()
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_monitoring(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Monitoring stack commands"""
     args = context.args
     subcommand = args[0] if args else ""
 
-    if subcommand == "start":
-        msg = await start_monitoring()
-    elif subcommand == "stop":
-        msg = await stop_monitoring()
-    else:
-        msg = await get_monitoring_status()
-
+    msg = await MONITORING_DISPATCH.get(subcommand, get_monitoring_status)()
     await update.message.reply_text(msg)
 
 
-@require_admin
-@log_command
+@command(admin=True)
 async def cmd_alert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Smart alerting control (LLM-powered)"""
     args = context.args
@@ -397,7 +426,6 @@ async def cmd_alert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if subcommand == "on":
         config.alert_enabled = True
         if not smart_alerter.running and config.admin_users:
-            from memory import memory_manager, server_logger
             smart_alerter.set_dependencies(context.bot, memory_manager, server_logger)
             smart_alerter.start()
         await update.message.reply_text("✅ Smart Alerter enabled (LLM-powered).")
@@ -423,14 +451,13 @@ async def cmd_alert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             await update.message.reply_text("⚠️ Smart Alerter has no bot connection.")
 
     elif subcommand == "check":
-        # Run immediate check
-        await update.message.reply_text("🔍 Running smart checks...")
-
-        # Get current values
-        gpu_temp = await get_gpu_temperature()
-        disk_pct = await get_disk_percent()
-        mem_pct = await get_memory_percent()
-        cpu_pct = await get_cpu_percent()
+        # Run immediate check; the ack and the metrics snapshot run concurrently
+        _, snap = await asyncio.gather(
+            update.message.reply_text("🔍 Running smart checks..."),
+            MetricsSnapshot.current(),
+        )
+        gpu_temp, disk_pct = snap.gpu_temp, snap.disk_percent
+        mem_pct, cpu_pct = snap.memory_percent, snap.cpu_percent
 
         lines = [
             "📊 CURRENT SYSTEM STATUS",
@@ -455,79 +482,111 @@ async def cmd_alert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("\n".join(lines))
 
     else:  # status
-        status_emoji = "🟢" if smart_alerter.running else "🔴"
-        enabled_emoji = "✅" if config.alert_enabled else "⛔"
+        coord_status = message_coordinator.get_status()
+        issues = smart_alerter._active_issues
+        state = (
+            smart_alerter.running,
+            config.alert_enabled,
+            config.alert_gpu_temp,
+            config.alert_disk_percent,
+            config.alert_memory_percent,
+            smart_alerter.check_interval,
+            smart_alerter.cooldown_minutes,
+            tuple(config.critical_services),
+            # None: no issues tracked yet; otherwise the active ones
+            tuple(key for key, is_active in issues.items() if is_active) if issues else None,
+            coord_status['daily_count'],
+            coord_status['daily_limit'],
+            coord_status['messages_last_hour'],
+            coord_status['quiet_hours'],
+            coord_status['quiet_hours_window'],
+            tuple(
+                (msg['source'], msg['type'], msg['minutes_ago'])
+                for msg in coord_status['recent_messages'][:3]
+            ),
+        )
+        await update.message.reply_text(_render_alert_status(state))
 
-        lines = [
-            "🤖 SMART ALERTER (LLM-Powered)",
-            "=" * 30,
-            "",
-            f"Status: {status_emoji} {'Running' if smart_alerter.running else 'Stopped'}",
-            f"Active: {enabled_emoji} {'Yes' if config.alert_enabled else 'No'}",
-            "",
-            "✨ FEATURES",
-            "  • LLM-powered personalized messages",
-            "  • Uses user memory",
-            "  • Context-aware suggestions",
-            "",
-            "📏 THRESHOLD VALUES",
-            f"  GPU Temperature: {config.alert_gpu_temp}°C",
-            f"  Disk Usage: {config.alert_disk_percent}%",
-            f"  Memory Usage: {config.alert_memory_percent}%",
-            "",
-            "⏱️ TIMINGS",
-            f"  Check Interval: {smart_alerter.check_interval}s",
-            f"  Cooldown: {smart_alerter.cooldown_minutes}min",
-            "",
-            "🔍 MONITORED SERVICES",
-            f"  {', '.join(config.critical_services) if config.critical_services else 'None'}",
-            "",
-            "📊 ACTIVE ISSUES",
-        ]
 
-        if smart_alerter._active_issues:
-            for key, is_active in smart_alerter._active_issues.items():
-                if is_active:
-                    lines.append(f"  ⚠️ {key}")
-        else:
-            lines.append("  None - Everything OK!")
+@lru_cache(maxsize=64)
+def _render_alert_status(state: tuple) -> str:
+    """Render /alert status; memoized since repeated polls see the same state"""
+    (
+        running, enabled, gpu_temp, disk_percent, memory_percent,
+        check_interval, cooldown_minutes, critical_services, active_issues,
+        daily_count, daily_limit, messages_last_hour, quiet_hours,
+        quiet_hours_window, recent_messages,
+    ) = state
 
-        # Add coordinator status
-        coord_status = message_coordinator.get_status()
-        lines.extend([
-            "",
-            "📬 MESSAGE COORDINATOR",
-            f"  Today's messages: {coord_status['daily_count']}/{coord_status['daily_limit']}",
-            f"  Last hour: {coord_status['messages_last_hour']} messages",
-            f"  Quiet hours: {'🌙 Active' if coord_status['quiet_hours'] else '☀️ Inactive'} ({coord_status['quiet_hours_window']})",
-        ])
+    status_emoji = "🟢" if running else "🔴"
+    enabled_emoji = "✅" if enabled else "⛔"
 
-        if coord_status['recent_messages']:
-            lines.append("  Recent messages:")
-            for msg in coord_status['recent_messages'][:3]:
-                lines.append(f"    • {msg['source']}/{msg['type']} ({msg['minutes_ago']}min ago)")
+    lines = [
+        "🤖 SMART ALERTER (LLM-Powered)",
+        "=" * 30,
+        "",
+        f"Status: {status_emoji} {'Running' if running else 'Stopped'}",
+        f"Active: {enabled_emoji} {'Yes' if enabled else 'No'}",
+        "",
+        "✨ FEATURES",
+        "  • LLM-powered personalized messages",
+        "  • Uses user memory",
+        "  • Context-aware suggestions",
+        "",
+        "📏 THRESHOLD VALUES",
+        f"  GPU Temperature: {gpu_temp}°C",
+        f"  Disk Usage: {disk_percent}%",
+        f"  Memory Usage: {memory_percent}%",
+        "",
+        "⏱️ TIMINGS",
+        f"  Check Interval: {check_interval}s",
+        f"  Cooldown: {cooldown_minutes}min",
+        "",
+        "🔍 MONITORED SERVICES",
+        f"  {', '.join(critical_services) if critical_services else 'None'}",
+        "",
+        "📊 ACTIVE ISSUES",
+    ]
 
-        await update.message.reply_text("\n".join(lines))
+    if active_issues is not None:
+        for key in active_issues:
+            lines.append(f"  ⚠️ {key}")
+    else:
+        lines.append("  None - Everything OK!")
 
+    # Add coordinator status
+    lines.extend([
+        "",
+        "📬 MESSAGE COORDINATOR",
+        f"  Today's messages: {daily_count}/{daily_limit}",
+        f"  Last hour: {messages_last_hour} messages",
+        f"  Quiet hours: {'🌙 Active' if quiet_hours else '☀️ Inactive'} ({quiet_hours_window})",
+    ])
 
-@require_auth
-@log_command
+    if recent_messages:
+        lines.append("  Recent messages:")
+        for source, msg_type, minutes_ago in recent_messages:
+            lines.append(f"    • {source}/{msg_type} ({minutes_ago}min ago)")
+
+    return "\n".join(lines)
+
+
+
+@command()
 async def cmd_conda(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List conda environments"""
     info = await get_conda_envs()
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_ollama(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Ollama commands"""
     args = context.args
     subcommand = args[0] if args else "models"
 
-    if subcommand == "models" or subcommand == "list":
-        info = await get_ollama_models()
-    elif subcommand == "pull" and len(args) > 1:
+    # Anything but "pull <model>" (models, list, unknown) lists models
+    if subcommand == "pull" and len(args) > 1:
         model = args[1]
         output, _ = await run_command(f"ollama pull {model}")
         info = f"Downloading model: {model}\n{output}"
@@ -537,8 +596,7 @@ async def cmd_ollama(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     await update.message.reply_text(info)
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_llm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """LLM status command"""
     args = context.args
@@ -551,8 +609,7 @@ async def cmd_llm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("Usage: /llm status")
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Confirm dangerous command"""
     result = await handle_confirm(update, context)
@@ -577,24 +634,21 @@ async def cmd_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 await update.message.reply_text(msg)
 
 
-@require_admin
-@log_command
+@command(admin=True)
 async def cmd_reboot(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Reboot system (requires confirmation)"""
     if await request_dangerous_confirmation(update, "reboot", []):
         return
 
 
-@require_admin
-@log_command
+@command(admin=True)
 async def cmd_shutdown(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Shutdown system (requires confirmation)"""
     if await request_dangerous_confirmation(update, "shutdown", []):
         return
 
 
-@require_admin
-@log_command
+@command(admin=True)
 async def cmd_kill(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Kill process (requires confirmation)"""
     args = context.args
@@ -607,82 +661,90 @@ async def cmd_kill(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_history(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show recent chat history"""
     args = context.args
-    limit = 10  # Default
-
-    if args and args[0].isdigit():
-        limit = min(int(args[0]), 50)  # Max 50
+    limit = min(_int_arg(args, 0, 10), 50)  # Default 10, max 50
 
     user_id = update.effective_user.id
-    messages = await db.get_chat_history(user_id, limit)
     total_count = await db.get_message_count(user_id)
 
-    if not messages:
+    buf = io.StringIO()
+    shown = 0
+    truncated = False
+
+    # Rows stream in oldest first; stop pulling them once the message is full
+    history = db.get_chat_history(user_id, limit)
+    try:
+        async for msg in history:
+            entry = _format_history_entry(msg)
+            if buf.tell() + len(entry) > HISTORY_MAX_CHARS:
+                truncated = True
+                break
+            buf.write(entry)
+            shown += 1
+    finally:
+        # break doesn't close an async generator; aclose() frees the cursor and connection
+        await history.aclose()
+
+    if not shown and not truncated:
         await update.message.reply_text("No chat history yet.")
         return
 
-    lines = [
-        f"📜 CHAT HISTORY (Last {len(messages)}/{total_count})",
-        "=" * 35,
-        ""
-    ]
+    # The rest of the query's rows were left unread, but they still count
+    if truncated:
+        shown = max(shown, min(limit, total_count))
 
-    # Reverse to show oldest first
-    for msg in reversed(messages):
-        timestamp = msg.get('created_at')
-        time_str = timestamp.strftime("%d/%m %H:%M") if timestamp else ""
-        msg_type = msg.get('message_type', '')
-        provider = msg.get('provider', '')
-        response_ms = msg.get('response_time_ms')
-
-        # Type icon
-        if msg_type == 'command':
-            icon = "⚡"
-        elif msg_type == 'claude':
-            icon = "🧠"
-        else:
-            icon = "💬"
+    header = f"📜 CHAT HISTORY (Last {shown}/{total_count})\n{'=' * 35}\n\n"
+    result = header + buf.getvalue().rstrip("\n")
+    if truncated:
+        result += "\n\n...(truncated)"
 
-        # User message (truncate)
-        user_msg = msg.get('user_message', '')[:80]
-        if len(msg.get('user_message', '')) > 80:
-            user_msg += "..."
+    await update.message.reply_text(result)
 
-        lines.append(f"{icon} [{time_str}] {user_msg}")
 
-        # Bot response preview
-        bot_resp = msg.get('bot_response', '')
-        if bot_resp and not bot_resp.startswith("ERROR"):
-            preview = bot_resp[:60].replace('\n', ' ')
-            if len(bot_resp) > 60:
-                preview += "..."
-            provider_info = f" [{provider}]" if provider else ""
-            time_info = f" {response_ms}ms" if response_ms else ""
-            lines.append(f"   → {preview}{provider_info}{time_info}")
+def _format_history_entry(msg: dict) -> str:
+    """Format one /history row (message line, response preview, blank line)"""
+    timestamp = msg.get('created_at')
+    time_str = timestamp.astimezone().strftime("%d/%m %H:%M") if timestamp else ""
+    msg_type = msg.get('message_type', '')
+    provider = msg.get('provider', '')
+    response_ms = msg.get('response_time_ms')
 
-        lines.append("")
+    # Type icon
+    if msg_type == 'command':
+        icon = "⚡"
+    elif msg_type == 'claude':
+        icon = "🧠"
+    else:
+        icon = "💬"
 
-    # Truncate if too long
-    result = "\n".join(lines)
-    if len(result) > 4000:
-        result = result[:3900] + "\n\n...(truncated)"
+    # User message (truncate)
+    user_msg = msg.get('user_message', '')[:80]
+    if len(msg.get('user_message', '')) > 80:
+        user_msg += "..."
 
-    await update.message.reply_text(result)
+    entry = f"{icon} [{time_str}] {user_msg}\n"
 
+    # Bot response preview
+    bot_resp = msg.get('bot_response', '')
+    if bot_resp and not bot_resp.startswith("ERROR"):
+        preview = bot_resp[:60].replace('\n', ' ')
+        if len(bot_resp) > 60:
+            preview += "..."
+        provider_info = f" [{provider}]" if provider else ""
+        time_info = f" {response_ms}ms" if response_ms else ""
+        entry += f"   → {preview}{provider_info}{time_info}\n"
 
-@require_auth
-@log_command
+    return entry + "\n"
+
+
+@command()
 async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show usage statistics"""
     args = context.args
-    days = 7  # Default
-
-    if args and args[0].isdigit():
-        days = int(args[0])
+    days = _int_arg(args, 0, 7)  # Default 7
 
     user_id = update.effective_user.id
     stats = await db.get_user_stats(user_id, days)
@@ -691,44 +753,41 @@ async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("Unable to retrieve statistics. Database connection may be down.")
         return
 
-    lines = [
-        f"📊 USAGE STATISTICS (Last {days} days)",
-        "=" * 35,
-        ""
-    ]
+    buf = io.StringIO()
+    buf.write(f"📊 USAGE STATISTICS (Last {days} days)\n{'=' * 35}\n\n")
 
     # Message counts
     if stats.get("messages"):
-        lines.append("📨 Message Counts:")
+        buf.write("📨 Message Counts:\n")
         for msg_type, count in stats["messages"].items():
-            lines.append(f"  {msg_type}: {count}")
-        lines.append("")
+            buf.write(f"  {msg_type}: {count}\n")
+        buf.write("\n")
 
     # Provider usage
     if stats.get("providers"):
-        lines.append("🤖 LLM Usage:")
+        buf.write("🤖 LLM Usage:\n")
         for provider, data in stats["providers"].items():
-            lines.append(f"  {provider}:")
-            lines.append(f"    Requests: {data['requests']}")
+            buf.write(f"  {provider}:\n    Requests: {data['requests']}\n")
             if data['tokens']:
-                lines.append(f"    Tokens: {data['tokens']}")
+                buf.write(f"    Tokens: {data['tokens']}\n")
             if data['cost'] > 0:
-                lines.append(f"    Cost: ${data['cost']:.4f}")
-        lines.append("")
+                buf.write(f"    Cost: ${data['cost']:.4f}\n")
+        buf.write("\n")
 
     # Claude stats
     if stats.get("claude") and stats["claude"]["sessions"]:
-        lines.append("🧠 Claude Code:")
-        lines.append(f"  Sessions: {stats['claude']['sessions']}")
-        lines.append(f"  Messages: {stats['claude']['messages']}")
+        buf.write(
+            f"🧠 Claude Code:\n"
+            f"  Sessions: {stats['claude']['sessions']}\n"
+            f"  Messages: {stats['claude']['messages']}\n"
+        )
         if stats['claude']['cost'] > 0:
-            lines.append(f"  Cost: ${stats['claude']['cost']:.4f}")
+            buf.write(f"  Cost: ${stats['claude']['cost']:.4f}\n")
 
-    await update.message.reply_text("\n".join(lines))
+    await update.message.reply_text(buf.getvalue().rstrip("\n"))
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Capture and send desktop screenshot"""
     await update.message.reply_text("📸 Capturing screenshot...")
@@ -747,8 +806,7 @@ async def cmd_screenshot(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
 
 
-@require_auth
-@log_command
+@command()
 async def cmd_chart(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Generate and send metric charts"""
     args = context.args
@@ -756,24 +814,17 @@ async def cmd_chart(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
     await update.message.reply_text(f"📊 Generating {chart_type.upper()} chart...")
 
-    image_data = None
-
-    if chart_type == "gpu":
-        image_data = await generate_gpu_chart()
-        caption = "🎮 GPU Metrics"
-    elif chart_type == "system":
-        image_data = await generate_system_chart()
-        caption = "🖥️ System Overview"
-    elif chart_type == "disk":
-        image_data = await generate_disk_chart()
-        caption = "💾 Disk Usage"
-    else:
+    chart = CHART_DISPATCH.get(chart_type)
+    if chart is None:
         await update.message.reply_text(
             "Usage: /chart <gpu|system|disk>\n"
             "Example: /chart gpu"
         )
         return
 
+    generate, caption = chart
+    image_data = await generate()
+
     if image_data:
         await update.message.reply_photo(
             photo=image_data,
@@ -786,8 +837,7 @@ async def cmd_chart(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
 
 
-@require_admin
-@log_command
+@command(admin=True)
 async def cmd_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Manage scheduled tasks"""
     args = context.args
@@ -795,19 +845,13 @@ async def cmd_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
     if subcommand == "list" or not args:
         status = scheduler.get_tasks_status()
-        await update.message.reply_text(status, parse_mode="Markdown")
-
-    elif subcommand == "enable" and len(args) > 1:
-        task_name = args[1]
-        if scheduler.enable_task(task_name):
-            await update.message.reply_text(f"✅ Task enabled: {task_name}")
-        else:
-            await update.message.reply_text(f"❌ Task not found: {task_name}")
+        await update.message.reply_text(status, parse_mode=ParseMode.MARKDOWN)
 
-    elif subcommand == "disable" and len(args) > 1:
+    elif subcommand in SCHEDULE_TOGGLES and len(args) > 1:
         task_name = args[1]
-        if scheduler.disable_task(task_name):
-            await update.message.reply_text(f"⛔ Task disabled: {task_name}")
+        toggle, emoji, verb = SCHEDULE_TOGGLES[subcommand]
+        if toggle(task_name):
+            await update.message.reply_text(f"{emoji} Task {verb}: {task_name}")
         else:
             await update.message.reply_text(f"❌ Task not found: {task_name}")
 
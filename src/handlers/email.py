@@ -31,10 +31,23 @@ RECIPIENT, SUBJECT, MESSAGE, CONFIRM = range(4)
 # Email validation regex
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
+# RFC 5321 caps a forward path at 254 characters
+MAX_EMAIL_LENGTH = 254
+
+# Replies that confirm sending
+CONFIRM_WORDS = frozenset({'yes', 'y', 'confirm', 'send', 'ok'})
+
+# Subject replies that mean "use the default subject"
+BLANK_SUBJECTS = frozenset({'-', ''})
+DEFAULT_SUBJECT = "Telegram Bot Message"
+
 
 def validate_email(email: str) -> bool:
-    """Validate email address format"""
-    return bool(EMAIL_REGEX.match(email.strip()))
+    """Validate email address format (expects an already stripped string)"""
+    # Cheap rejects before running the regex
+    if "@" not in email or len(email) > MAX_EMAIL_LENGTH:
+        return False
+    return EMAIL_REGEX.match(email) is not None
 
 
 @require_auth
@@ -78,8 +91,8 @@ async def email_subject(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     """Receive subject and ask for message"""
     subject = update.message.text.strip()
 
-    if subject == "-" or subject == "":
-        subject = "Telegram Bot Message"
+    if subject in BLANK_SUBJECTS:
+        subject = DEFAULT_SUBJECT
 
     context.user_data['subject'] = subject
 
@@ -129,9 +142,7 @@ async def email_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     user = update.effective_user
 
     # Check for confirmation
-    confirm_words = ['yes', 'y', 'confirm', 'send', 'ok']
-
-    if response in confirm_words:
+    if response in CONFIRM_WORDS:
         recipient = context.user_data.get('recipient')
         subject = context.user_data.get('subject')
         message = context.user_data.get('message')
@@ -152,7 +163,7 @@ async def email_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
             )
 
             # Log to database
-            await db.log_message(
+            db.queue_message(
                 user_id=user.id,
                 username=user.username,
                 message_type="email",
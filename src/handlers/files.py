@@ -4,7 +4,10 @@ File Upload/Download Handlers
 Allows users to transfer files to/from the server via Telegram.
 """
 
+import asyncio
+import io
 import os
+import re
 import logging
 from pathlib import Path
 from typing import Optional
@@ -19,6 +22,18 @@ logger = logging.getLogger(__name__)
 # Maximum file size for download (50 MB - Telegram limit)
 MAX_DOWNLOAD_SIZE = 50 * 1024 * 1024
 
+# /cat reads files backwards from the end in blocks of this size, and never
+# more than TAIL_MAX_BYTES in total (far beyond what fits in one message)
+TAIL_CHUNK_SIZE = 64 * 1024
+TAIL_MAX_BYTES = 1024 * 1024
+
+# Mode for uploaded files; the download writes into the placeholder we create,
+# so this is the mode the file keeps (os.open would otherwise default to 0o777)
+UPLOAD_FILE_MODE = 0o600
+
+# Give up finding a free "name_N.ext" after this many collisions
+MAX_NAME_ATTEMPTS = 10000
+
 # Default upload directory - user should configure this
 DEFAULT_UPLOAD_DIR = Path.home() / "telegram_uploads"
 
@@ -29,6 +44,9 @@ ALLOWED_PATHS = [
     Path("/tmp"),
 ]
 
+# Resolved once at import; resolving walks every component with syscalls
+ALLOWED_RESOLVED = tuple(p.expanduser().resolve() for p in ALLOWED_PATHS)
+
 # Blocked patterns (never allow download of these)
 BLOCKED_PATTERNS = [
     ".env",
@@ -41,31 +59,118 @@ BLOCKED_PATTERNS = [
     ".git/config",
 ]
 
+# All blocked patterns as one case-insensitive alternation, scanned in a single pass
+BLOCKED_REGEX = re.compile("|".join(map(re.escape, BLOCKED_PATTERNS)), re.IGNORECASE)
+
+# Upload filenames keep alphanumerics and "._-"; bytes.translate deletes
+# every other ASCII byte in one C-level pass
+FILENAME_KEEP = "._-"
+FILENAME_DELETE_BYTES = bytes(
+    b for b in range(128) if not (chr(b).isalnum() or chr(b) in FILENAME_KEEP)
+)
+
+# Byte cap on sanitized names; leaves room for a "_N" collision suffix
+# under the usual 255-byte filesystem limit
+MAX_FILENAME_BYTES = 200
+MAX_SUFFIX_BYTES = 16
+
+
+def sanitize_filename(file_name: str) -> str:
+    """Keep only alphanumerics, dots, underscores and dashes, within MAX_FILENAME_BYTES"""
+    if file_name.isascii():
+        safe = file_name.encode("ascii").translate(None, FILENAME_DELETE_BYTES).decode("ascii")
+    else:
+        # Non-ASCII letters (e.g. accented names) are kept, so check per character
+        safe = "".join(c for c in file_name if c.isalnum() or c in FILENAME_KEEP)
+
+    encoded = safe.encode()
+    if len(encoded) <= MAX_FILENAME_BYTES:
+        return safe
+
+    # Trim the stem and keep a short extension intact
+    stem, suffix = os.path.splitext(safe)
+    if len(suffix.encode()) > MAX_SUFFIX_BYTES:
+        stem, suffix = safe, ""
+    budget = MAX_FILENAME_BYTES - len(suffix.encode())
+    return stem.encode()[:budget].decode("utf-8", errors="ignore") + suffix
+
 
 def is_path_allowed(path: Path) -> bool:
     """Check if path is allowed for download"""
+    # The requested path itself is always resolved fresh (symlinks, "..")
     resolved = path.resolve()
 
     # Check if under allowed paths
-    allowed = False
-    for allowed_path in ALLOWED_PATHS:
-        try:
-            resolved.relative_to(allowed_path.resolve())
-            allowed = True
-            break
-        except ValueError:
-            continue
-
-    if not allowed:
+    if not any(resolved.is_relative_to(allowed) for allowed in ALLOWED_RESOLVED):
         return False
 
     # Check blocked patterns
-    path_str = str(resolved).lower()
-    for pattern in BLOCKED_PATTERNS:
-        if pattern.lower() in path_str:
-            return False
+    return BLOCKED_REGEX.search(str(resolved)) is None
+
+
+# Size unit per power of 1024, indexed by bit_length
+SIZE_UNITS = ("B", "K", "M", "G")
+
 
-    return True
+def _fmt_size(size: int, precise: bool = False) -> str:
+    """Format a byte count: "12K" for listings, "12.3 KB" when precise"""
+    idx = min(max(0, (size.bit_length() - 1) // 10), len(SIZE_UNITS) - 1)
+    if idx == 0:
+        return f"{size} B" if precise else f"{size}B"
+    if precise:
+        return f"{size / (1 << (10 * idx)):.1f} {SIZE_UNITS[idx]}B"
+    return f"{size >> (10 * idx)}{SIZE_UNITS[idx]}"
+
+
+def tail_lines(path: Path, n: int) -> tuple[list[str], Optional[int]]:
+    """
+    Read the last n lines of a file without loading the whole file.
+
+    Returns (lines, total_lines); total_lines is None unless the read
+    reached the start of the file.
+    """
+    blocks = []
+    newlines = 0
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        end = pos
+        # n complete lines need n + 1 newlines (or the start of the file)
+        while pos > 0 and newlines <= n and end - pos < TAIL_MAX_BYTES:
+            size = min(TAIL_CHUNK_SIZE, pos)
+            pos -= size
+            f.seek(pos)
+            block = f.read(size)
+            newlines += block.count(b"\n")
+            blocks.append(block)
+
+    text = b"".join(reversed(blocks)).decode("utf-8", errors="replace")
+    # Same newline handling as reading the file in text mode
+    lines = io.StringIO(text, newline=None).readlines()
+
+    if pos > 0:
+        # Started mid-file, so the first line is partial
+        return lines[1:][-n:], None
+    return lines[-n:], len(lines)
+
+
+def reserve_upload_path(upload_dir: Path, file_name: str) -> Path:
+    """
+    Atomically claim a free path for an upload, adding _1, _2, ... on collision.
+
+    The file is created empty with O_EXCL, so concurrent uploads of the same
+    name can't both pick it.
+    """
+    original = Path(file_name)
+    for counter in range(MAX_NAME_ATTEMPTS):
+        name = file_name if counter == 0 else f"{original.stem}_{counter}{original.suffix}"
+        candidate = upload_dir / name
+        try:
+            os.close(os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL, UPLOAD_FILE_MODE))
+        except FileExistsError:
+            continue
+        return candidate
+
+    raise FileExistsError(f"No free name for {file_name} in {upload_dir}")
 
 
 def get_file_info(path: Path) -> str:
@@ -73,16 +178,7 @@ def get_file_info(path: Path) -> str:
     if not path.exists():
         return "File not found"
 
-    stat = path.stat()
-    size = stat.st_size
-
-    if size < 1024:
-        size_str = f"{size} B"
-    elif size < 1024 * 1024:
-        size_str = f"{size / 1024:.1f} KB"
-    else:
-        size_str = f"{size / (1024 * 1024):.1f} MB"
-
+    size_str = _fmt_size(path.stat().st_size, precise=True)
     return f"📄 {path.name}\n📦 Size: {size_str}"
 
 
@@ -137,14 +233,18 @@ async def cmd_download(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
     # Send file
     try:
-        await update.message.reply_text(f"📤 Sending file: {file_path.name}")
+        # Read on a worker thread (while the notice goes out) so a large
+        # file doesn't block the event loop; PTB would read it synchronously
+        _, data = await asyncio.gather(
+            update.message.reply_text(f"📤 Sending file: {file_path.name}"),
+            asyncio.to_thread(file_path.read_bytes),
+        )
 
-        with open(file_path, "rb") as f:
-            await update.message.reply_document(
-                document=f,
-                filename=file_path.name,
-                caption=get_file_info(file_path)
-            )
+        await update.message.reply_document(
+            document=data,
+            filename=file_path.name,
+            caption=get_file_info(file_path)
+        )
 
         logger.info(f"File downloaded: {file_path} by user {update.effective_user.id}")
 
@@ -176,8 +276,11 @@ async def cmd_ls(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     try:
-        items = list(dir_path.iterdir())
-        items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
+        # DirEntry answers is_dir() from the directory listing's file type
+        # where it can, instead of a stat per entry
+        with os.scandir(dir_path) as it:
+            items = list(it)
+        items.sort(key=lambda e: (not e.is_dir(), e.name.lower()))
 
         lines = [
             f"📁 {dir_path}",
@@ -189,14 +292,7 @@ async def cmd_ls(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             if item.is_dir():
                 lines.append(f"📁 {item.name}/")
             else:
-                size = item.stat().st_size
-                if size < 1024:
-                    size_str = f"{size}B"
-                elif size < 1024 * 1024:
-                    size_str = f"{size // 1024}K"
-                else:
-                    size_str = f"{size // (1024 * 1024)}M"
-                lines.append(f"📄 {item.name} ({size_str})")
+                lines.append(f"📄 {item.name} ({_fmt_size(item.stat().st_size)})")
 
         if len(items) > 50:
             lines.append(f"\n...and {len(items) - 50} more")
@@ -232,7 +328,7 @@ async def handle_file_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
     file_name = document.file_name or f"upload_{document.file_id}"
 
     # Sanitize filename
-    file_name = "".join(c for c in file_name if c.isalnum() or c in "._-")
+    file_name = sanitize_filename(file_name)
     if not file_name:
         file_name = f"upload_{document.file_id}"
 
@@ -250,18 +346,14 @@ async def handle_file_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(f"📥 Downloading file: {file_name}")
 
         file = await document.get_file()
-        save_path = upload_dir / file_name
-
-        # Add suffix if exists
-        counter = 1
-        original_path = save_path
-        while save_path.exists():
-            stem = original_path.stem
-            suffix = original_path.suffix
-            save_path = upload_dir / f"{stem}_{counter}{suffix}"
-            counter += 1
+        save_path = reserve_upload_path(upload_dir, file_name)
 
-        await file.download_to_drive(save_path)
+        try:
+            await file.download_to_drive(save_path)
+        except BaseException:
+            # Don't leave the empty placeholder behind
+            save_path.unlink(missing_ok=True)
+            raise
 
         await update.message.reply_text(
             f"✅ File saved!\n\n"
@@ -308,18 +400,17 @@ async def cmd_cat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
 
     try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            lines = f.readlines()
-
-        total_lines = len(lines)
-        lines = lines[-lines_limit:]  # Last N lines
+        lines, total_lines = tail_lines(file_path, lines_limit)  # Last N lines
 
         content = "".join(lines)
         if len(content) > 3900:
             content = content[-3900:]
             content = "...(truncated)\n" + content
 
-        header = f"📄 {file_path.name} (last {len(lines)}/{total_lines} lines)\n"
+        if total_lines is None:
+            header = f"📄 {file_path.name} (last {len(lines)} lines)\n"
+        else:
+            header = f"📄 {file_path.name} (last {len(lines)}/{total_lines} lines)\n"
         header += "=" * 30 + "\n\n"
 
         await update.message.reply_text(header + content)
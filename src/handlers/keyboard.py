@@ -4,7 +4,11 @@ Inline Keyboard Handlers
 Provides interactive buttons for common actions.
 """
 
+import asyncio
 import logging
+from functools import lru_cache
+from typing import Any, Union
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler
 
@@ -25,7 +29,24 @@ CB_QUICK = "quick"
 CB_CONFIRM = "cfm"
 CB_CANCEL = "cancel"
 
+# Minimum seconds between edits of the same message; presses in between
+# are coalesced so only the latest content is sent
+EDIT_MIN_INTERVAL = 1.0
+
+# Prune expired per-message edit timestamps once this many accumulate
+EDIT_STATE_MAX = 1024
+
+EditKey = Union[str, tuple[int, int]]
 
+# Message -> loop time before which it may not be edited again
+_edit_ready_at: dict[EditKey, float] = {}
+# Message -> latest edit waiting for its slot (query, text, kwargs)
+_pending_edits: dict[EditKey, tuple[Any, str, dict]] = {}
+# Keep references to in-flight deferred edits
+_edit_tasks: set[asyncio.Task] = set()
+
+
+@lru_cache(maxsize=1)
 def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     """Get the main menu inline keyboard"""
     keyboard = [
@@ -45,6 +66,7 @@ def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+@lru_cache(maxsize=1)
 def get_services_keyboard() -> InlineKeyboardMarkup:
     """Get the services management keyboard"""
     keyboard = []
@@ -68,6 +90,8 @@ def get_services_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+# Bounded: service names arrive in callback data
+@lru_cache(maxsize=64)
 def get_service_actions_keyboard(service_name: str) -> InlineKeyboardMarkup:
     """Get action buttons for a specific service"""
     keyboard = [
@@ -95,37 +119,131 @@ def get_confirm_keyboard(action: str, data: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+# Static sub-menu keyboards; PTB markups are immutable, so one instance is shared
+STATUS_MARKUP = InlineKeyboardMarkup([[
+    InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:status"),
+    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
+]])
+
+GPU_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📊 Full", callback_data=f"{CB_QUICK}:gpu_full"),
+        InlineKeyboardButton("📈 Procs", callback_data=f"{CB_QUICK}:gpu_procs"),
+    ],
+    [
+        InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:gpu"),
+        InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
+    ],
+])
+
+BACK_TO_GPU = InlineKeyboardMarkup([[
+    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:gpu"),
+]])
+
+DISK_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📁 Full", callback_data=f"{CB_QUICK}:disk_full"),
+        InlineKeyboardButton("📊 Large", callback_data=f"{CB_QUICK}:disk_large"),
+    ],
+    [
+        InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:disk"),
+        InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
+    ],
+])
+
+BACK_TO_DISK = InlineKeyboardMarkup([[
+    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:disk"),
+]])
+
+MEMORY_MARKUP = InlineKeyboardMarkup([[
+    InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:memory"),
+    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
+]])
+
+DOCKER_MARKUP = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📦 All", callback_data=f"{CB_QUICK}:docker_all"),
+        InlineKeyboardButton("📊 Stats", callback_data=f"{CB_QUICK}:docker_stats"),
+    ],
+    [
+        InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:docker"),
+        InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
+    ],
+])
+
+BACK_TO_DOCKER = InlineKeyboardMarkup([[
+    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:docker"),
+]])
+
+
+def _edit_key(query) -> EditKey:
+    """Identify the message a callback query edits"""
+    if query.inline_message_id:
+        return query.inline_message_id
+    return (query.message.chat_id, query.message.message_id)
+
+
+async def _throttled_edit(query, text: str, **kwargs: Any) -> None:
+    """
+    Edit the query's message at most once per EDIT_MIN_INTERVAL.
+
+    The first edit in a window is sent right away (errors propagate to the
+    caller). Later ones are deferred to the end of the window, and only the
+    newest of them is sent.
+    """
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    key = _edit_key(query)
+
+    if len(_edit_ready_at) > EDIT_STATE_MAX:
+        for stale in [k for k, t in _edit_ready_at.items() if t <= now and k not in _pending_edits]:
+            del _edit_ready_at[stale]
+
+    wait = _edit_ready_at.get(key, 0.0) - now
+    if wait <= 0 and key not in _pending_edits:
+        _edit_ready_at[key] = now + EDIT_MIN_INTERVAL
+        await query.edit_message_text(text, **kwargs)
+        return
+
+    if key not in _pending_edits:
+        loop.call_later(max(wait, 0.0), _flush_edit, key)
+    _pending_edits[key] = (query, text, kwargs)
+
+
+def _flush_edit(key: EditKey) -> None:
+    """Send the newest deferred edit for a message"""
+    query, text, kwargs = _pending_edits.pop(key)
+    _edit_ready_at[key] = asyncio.get_running_loop().time() + EDIT_MIN_INTERVAL
+
+    task = asyncio.create_task(_send_deferred_edit(query, text, kwargs))
+    _edit_tasks.add(task)
+    task.add_done_callback(_edit_tasks.discard)
+
+
+async def _send_deferred_edit(query, text: str, kwargs: dict) -> None:
+    """Deferred edits have no caller left to report to, so log failures"""
+    try:
+        await query.edit_message_text(text, **kwargs)
+    except Exception as e:
+        logger.warning(f"Deferred menu edit failed: {e}")
+
+
 @require_auth
 async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle inline keyboard button presses"""
     query = update.callback_query
     await query.answer()  # Acknowledge the button press
 
-    data = query.data
-    parts = data.split(":")
-
-    if len(parts) < 2:
+    # "category:action:rest"; rest is only split further by handlers that use it
+    category, _, rest = query.data.partition(":")
+    handler = CALLBACK_DISPATCH.get(category)
+    if handler is None:
         return
 
-    category = parts[0]
-    action = parts[1]
+    action, _, tail = rest.partition(":")
 
     try:
-        if category == CB_QUICK:
-            await handle_quick_action(query, action)
-
-        elif category == CB_SERVICE:
-            service = parts[2] if len(parts) > 2 else None
-            await handle_service_action(query, action, service)
-
-        elif category == CB_CONFIRM:
-            if action == "yes" and len(parts) >= 4:
-                confirmed_action = parts[2]
-                confirmed_data = parts[3]
-                await handle_confirmed_action(query, confirmed_action, confirmed_data)
-
-        elif category == CB_CANCEL:
-            await query.edit_message_text("❌ Operation cancelled.")
+        await handler(query, action, tail)
 
     except Exception as e:
         logger.error(f"Callback query error: {e}")
@@ -135,7 +253,8 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
 async def handle_quick_action(query, action: str) -> None:
     """Handle quick action buttons"""
     if action == "menu":
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             "🤖 AI Server Bot - Quick Access",
             reply_markup=get_main_menu_keyboard()
         )
@@ -143,28 +262,18 @@ async def handle_quick_action(query, action: str) -> None:
     elif action == "status":
         from tools.system import get_full_status
         status = await get_full_status()
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             status,
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:status"),
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
-            ]])
+            reply_markup=STATUS_MARKUP
         )
 
     elif action == "gpu":
         info = await get_gpu_info("summary")
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             info,
-            reply_markup=InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("📊 Full", callback_data=f"{CB_QUICK}:gpu_full"),
-                    InlineKeyboardButton("📈 Procs", callback_data=f"{CB_QUICK}:gpu_procs"),
-                ],
-                [
-                    InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:gpu"),
-                    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
-                ],
-            ])
+            reply_markup=GPU_MARKUP
         )
 
     elif action == "gpu_full":
@@ -172,101 +281,79 @@ async def handle_quick_action(query, action: str) -> None:
         # Truncate if too long
         if len(info) > 4000:
             info = info[:3900] + "\n...(truncated)"
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"```\n{info}\n```",
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:gpu"),
-            ]])
+            reply_markup=BACK_TO_GPU
         )
 
     elif action == "gpu_procs":
         info = await get_gpu_info("processes")
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             info,
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:gpu"),
-            ]])
+            reply_markup=BACK_TO_GPU
         )
 
     elif action == "disk":
         info = await get_disk_usage("summary")
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             info,
-            reply_markup=InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("📁 Full", callback_data=f"{CB_QUICK}:disk_full"),
-                    InlineKeyboardButton("📊 Large", callback_data=f"{CB_QUICK}:disk_large"),
-                ],
-                [
-                    InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:disk"),
-                    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
-                ],
-            ])
+            reply_markup=DISK_MARKUP
         )
 
     elif action == "disk_full":
         info = await get_disk_usage("full")
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"```\n{info}\n```",
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:disk"),
-            ]])
+            reply_markup=BACK_TO_DISK
         )
 
     elif action == "disk_large":
         info = await get_disk_usage("large")
         if len(info) > 4000:
             info = info[:3900] + "\n...(truncated)"
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             info,
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:disk"),
-            ]])
+            reply_markup=BACK_TO_DISK
         )
 
     elif action == "memory":
         info = await get_memory_usage()
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"```\n{info}\n```",
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:memory"),
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
-            ]])
+            reply_markup=MEMORY_MARKUP
         )
 
     elif action == "services":
         status = await get_all_services_status()
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             status,
             reply_markup=get_services_keyboard()
         )
 
     elif action == "docker":
         info = await list_containers()
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             info,
-            reply_markup=InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("📦 All", callback_data=f"{CB_QUICK}:docker_all"),
-                    InlineKeyboardButton("📊 Stats", callback_data=f"{CB_QUICK}:docker_stats"),
-                ],
-                [
-                    InlineKeyboardButton("🔄 Refresh", callback_data=f"{CB_QUICK}:docker"),
-                    InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:menu"),
-                ],
-            ])
+            reply_markup=DOCKER_MARKUP
         )
 
     elif action == "docker_all":
         info = await list_containers(all_containers=True)
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             info,
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:docker"),
-            ]])
+            reply_markup=BACK_TO_DOCKER
         )
 
     elif action == "docker_stats":
@@ -274,12 +361,11 @@ async def handle_quick_action(query, action: str) -> None:
         info = await get_container_stats()
         if len(info) > 4000:
             info = info[:3900] + "\n...(truncated)"
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"```\n{info}\n```",
             parse_mode="Markdown",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("⬅️ Back", callback_data=f"{CB_QUICK}:docker"),
-            ]])
+            reply_markup=BACK_TO_DOCKER
         )
 
 
@@ -291,7 +377,8 @@ async def handle_service_action(query, action: str, service: str) -> None:
         status, is_running = await get_service_status(service)
         status_emoji = "🟢" if is_running else "🔴"
 
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"{status_emoji} **{service}**\n\n{status}",
             parse_mode="Markdown",
             reply_markup=get_service_actions_keyboard(service)
@@ -300,14 +387,16 @@ async def handle_service_action(query, action: str, service: str) -> None:
     elif action == "start":
         success, msg = await start_service(service)
         status_emoji = "✅" if success else "❌"
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"{status_emoji} {msg}",
             reply_markup=get_service_actions_keyboard(service)
         )
 
     elif action == "stop":
         # Request confirmation for stop
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"⚠️ **{service}** - Are you sure you want to stop this service?",
             parse_mode="Markdown",
             reply_markup=get_confirm_keyboard("stop_service", service)
@@ -316,18 +405,17 @@ async def handle_service_action(query, action: str, service: str) -> None:
     elif action == "restart":
         success, msg = await restart_service(service)
         status_emoji = "✅" if success else "❌"
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"{status_emoji} {msg}",
             reply_markup=get_service_actions_keyboard(service)
         )
 
     elif action == "logs":
         from tools.docker import get_container_logs
-        logs = await get_container_logs(service, lines=30)
-        if len(logs) > 4000:
-            logs = logs[-3900:]
-            logs = "...(truncated)\n" + logs
-        await query.edit_message_text(
+        logs = await get_container_logs(service, lines=30, max_bytes=3800)
+        await _throttled_edit(
+            query,
             f"📋 **{service}** Logs:\n```\n{logs}\n```",
             parse_mode="Markdown",
             reply_markup=InlineKeyboardMarkup([[
@@ -341,12 +429,40 @@ async def handle_confirmed_action(query, action: str, data: str) -> None:
     if action == "stop_service":
         success, msg = await stop_service(data)
         status_emoji = "✅" if success else "❌"
-        await query.edit_message_text(
+        await _throttled_edit(
+            query,
             f"{status_emoji} {msg}",
             reply_markup=get_service_actions_keyboard(data)
         )
 
 
+async def _on_quick(query, action: str, tail: str) -> None:
+    await handle_quick_action(query, action)
+
+
+async def _on_service(query, action: str, tail: str) -> None:
+    await handle_service_action(query, action, tail or None)
+
+
+async def _on_confirm(query, action: str, tail: str) -> None:
+    confirmed_action, sep, confirmed_data = tail.partition(":")
+    if action == "yes" and sep:
+        await handle_confirmed_action(query, confirmed_action, confirmed_data)
+
+
+async def _on_cancel(query, action: str, tail: str) -> None:
+    await query.edit_message_text("❌ Operation cancelled.")
+
+
+# Callback data category -> handler(query, action, tail)
+CALLBACK_DISPATCH = {
+    CB_QUICK: _on_quick,
+    CB_SERVICE: _on_service,
+    CB_CONFIRM: _on_confirm,
+    CB_CANCEL: _on_cancel,
+}
+
+
 @require_auth
 async def cmd_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show the main menu with inline keyboard"""
@@ -8,6 +8,9 @@ Includes memory integration for personalized responses.
 
 import asyncio
 import time
+from functools import wraps
+from typing import Callable
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
@@ -136,7 +139,7 @@ async def get_conversation_history(user_id: int, limit: int = 8) -> str:
     for msg in messages:
         # Format timestamp
         timestamp = msg.get('created_at')
-        time_str = timestamp.strftime("%H:%M") if timestamp else ""
+        time_str = timestamp.astimezone().strftime("%H:%M") if timestamp else ""
 
         # User message
         user_msg = msg.get('user_message', '')
@@ -280,7 +283,7 @@ async def handle_llm_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
 
         # Log error
-        await db.log_message(
+        db.queue_message(
             user_id=user.id,
             username=user.username,
             message_type="text",
@@ -354,5 +357,48 @@ async def handle_llm_message_streaming(update: Update, context: ContextTypes.DEF
             await update.message.reply_text(f"LLM Error: {str(e)}")
 
 
+# Per-chat backpressure for the natural language handler
+QUEUE_THRESHOLD = 2  # in-flight + waiting messages before new ones are dropped
+BUSY_MESSAGE = "Still working on your previous messages…"
+
+_inflight: dict[int, asyncio.Semaphore] = {}
+_depth: dict[int, int] = {}
+
+
+def per_chat_backpressure(func: Callable) -> Callable:
+    """
+    Decorator that serializes LLM requests per chat and drops bursts.
+
+    Messages are processed one at a time per chat. Once QUEUE_THRESHOLD
+    messages are in flight or waiting, further messages get BUSY_MESSAGE
+    instead of piling up more LLM calls.
+    """
+    @wraps(func)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat = update.effective_chat
+        if chat is None:
+            return await func(update, context)
+
+        chat_id = chat.id
+        depth = _depth.get(chat_id, 0) + 1
+        if depth > QUEUE_THRESHOLD:
+            if update.message:
+                await update.message.reply_text(BUSY_MESSAGE)
+            return
+
+        _depth[chat_id] = depth
+        semaphore = _inflight.setdefault(chat_id, asyncio.Semaphore(1))
+        try:
+            async with semaphore:
+                return await func(update, context)
+        finally:
+            _depth[chat_id] -= 1
+            if not _depth[chat_id]:
+                del _depth[chat_id]
+                _inflight.pop(chat_id, None)
+
+    return wrapper
+
+
 # Use non-streaming by default for simplicity
-handle_message = handle_llm_message
+handle_message = per_chat_backpressure(handle_llm_message)
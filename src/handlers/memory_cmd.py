@@ -13,6 +13,10 @@ from memory import memory_manager, server_logger, proactive_agent, conversation_
 
 logger = logging.getLogger(__name__)
 
+# Accepted /proactive toggle spellings
+PROACTIVE_ON = frozenset({"on", "enable"})
+PROACTIVE_OFF = frozenset({"off", "disable"})
+
 
 @require_admin
 async def cmd_memory_view(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -278,12 +282,12 @@ async def cmd_proactive_status(update: Update, context: ContextTypes.DEFAULT_TYP
     if args:
         action = args[0].lower()
 
-        if action in ["on", "enable"]:
+        if action in PROACTIVE_ON:
             proactive_agent.config.enabled = True
             await update.message.reply_text("✅ Proactive agent enabled")
             return
 
-        if action in ["off", "disable"]:
+        if action in PROACTIVE_OFF:
             proactive_agent.config.enabled = False
             await update.message.reply_text("⏸️ Proactive agent disabled")
             return
@@ -54,7 +54,19 @@ class ConversationAnalyzer:
             return False
 
         try:
-            await self._create_tables()
+            async with self.pool.acquire() as conn:
+                return await self.initialize_with_conn(pool, memory_manager, conn)
+        except Exception as e:
+            logger.error(f"Failed to initialize ConversationAnalyzer: {e}")
+            return False
+
+    async def initialize_with_conn(self, pool, memory_manager, conn) -> bool:
+        """Initialize on an already acquired connection (e.g. the startup transaction)"""
+        self.pool = pool
+        self.memory_manager = memory_manager
+        try:
+            async with conn.transaction():
+                await self._create_tables(conn)
             self._initialized = True
             self._analysis_task = asyncio.create_task(self._analysis_loop())
             logger.info("ConversationAnalyzer initialized")
@@ -63,31 +75,30 @@ class ConversationAnalyzer:
             logger.error(f"Failed to initialize ConversationAnalyzer: {e}")
             return False
 
-    async def _create_tables(self):
+    async def _create_tables(self, conn):
         """Create insight tables"""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS conversation_insights (
-                    id SERIAL PRIMARY KEY,
-                    message_id INTEGER,
-                    conversation_date DATE DEFAULT CURRENT_DATE,
-                    insight_type VARCHAR(50) NOT NULL,
-                    category VARCHAR(50),
-                    content TEXT NOT NULL,
-                    extracted_entities JSONB DEFAULT '[]',
-                    sentiment VARCHAR(20),
-                    confidence FLOAT DEFAULT 0.8,
-                    extracted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    processed BOOLEAN DEFAULT FALSE,
-                    applied_to_memory BOOLEAN DEFAULT FALSE,
-                    memory_id INTEGER
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_insights_date
-                ON conversation_insights(conversation_date DESC);
-                CREATE INDEX IF NOT EXISTS idx_insights_processed
-                ON conversation_insights(processed);
-            """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_insights (
+                id SERIAL PRIMARY KEY,
+                message_id INTEGER,
+                conversation_date DATE DEFAULT CURRENT_DATE,
+                insight_type VARCHAR(50) NOT NULL,
+                category VARCHAR(50),
+                content TEXT NOT NULL,
+                extracted_entities JSONB DEFAULT '[]',
+                sentiment VARCHAR(20),
+                confidence FLOAT DEFAULT 0.8,
+                extracted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                processed BOOLEAN DEFAULT FALSE,
+                applied_to_memory BOOLEAN DEFAULT FALSE,
+                memory_id INTEGER
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_insights_date
+            ON conversation_insights(conversation_date DESC);
+            CREATE INDEX IF NOT EXISTS idx_insights_processed
+            ON conversation_insights(processed);
+        """)
 
     async def _analysis_loop(self):
         """Background loop for processing pending analyses"""
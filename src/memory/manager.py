@@ -74,8 +74,20 @@ class MemoryManager:
             return False
 
         try:
-            await self._create_tables()
-            await self._load_cache()
+            async with self.pool.acquire() as conn:
+                return await self.initialize_with_conn(pool, conn)
+        except Exception as e:
+            logger.error(f"Failed to initialize MemoryManager: {e}")
+            return False
+
+    async def initialize_with_conn(self, pool, conn) -> bool:
+        """Initialize on an already acquired connection (e.g. the startup transaction)"""
+        self.pool = pool
+        try:
+            # Savepoint when nested, so a failure doesn't abort the caller's transaction
+            async with conn.transaction():
+                await self._create_tables(conn)
+                await self._load_cache(conn)
             self._initialized = True
             logger.info(f"MemoryManager initialized with {len(self._cache)} memories")
             return True
@@ -83,57 +95,55 @@ class MemoryManager:
             logger.error(f"Failed to initialize MemoryManager: {e}")
             return False
 
-    async def _create_tables(self):
+    async def _create_tables(self, conn):
         """Create memory tables if they don't exist"""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS user_memory (
-                    id SERIAL PRIMARY KEY,
-                    category VARCHAR(50) NOT NULL,
-                    subcategory VARCHAR(100),
-                    key VARCHAR(255) NOT NULL,
-                    value TEXT NOT NULL,
-                    metadata JSONB DEFAULT '{}',
-                    source VARCHAR(50) NOT NULL DEFAULT 'manual',
-                    confidence FLOAT DEFAULT 1.0,
-                    importance INTEGER DEFAULT 5,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    last_accessed_at TIMESTAMP WITH TIME ZONE,
-                    access_count INTEGER DEFAULT 0,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    related_memories INTEGER[],
-                    UNIQUE(category, key)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_memory_category ON user_memory(category);
-                CREATE INDEX IF NOT EXISTS idx_memory_importance ON user_memory(importance DESC);
-                CREATE INDEX IF NOT EXISTS idx_memory_active ON user_memory(is_active);
-            """)
-
-    async def _load_cache(self):
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_memory (
+                id SERIAL PRIMARY KEY,
+                category VARCHAR(50) NOT NULL,
+                subcategory VARCHAR(100),
+                key VARCHAR(255) NOT NULL,
+                value TEXT NOT NULL,
+                metadata JSONB DEFAULT '{}',
+                source VARCHAR(50) NOT NULL DEFAULT 'manual',
+                confidence FLOAT DEFAULT 1.0,
+                importance INTEGER DEFAULT 5,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                last_accessed_at TIMESTAMP WITH TIME ZONE,
+                access_count INTEGER DEFAULT 0,
+                is_active BOOLEAN DEFAULT TRUE,
+                related_memories INTEGER[],
+                UNIQUE(category, key)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_memory_category ON user_memory(category);
+            CREATE INDEX IF NOT EXISTS idx_memory_importance ON user_memory(importance DESC);
+            CREATE INDEX IF NOT EXISTS idx_memory_active ON user_memory(is_active);
+        """)
+
+    async def _load_cache(self, conn):
         """Load all active memories into cache"""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM user_memory WHERE is_active = TRUE
-            """)
-            for row in rows:
-                key = f"{row['category']}:{row['key']}"
-                self._cache[key] = Memory(
-                    id=row['id'],
-                    category=row['category'],
-                    subcategory=row['subcategory'],
-                    key=row['key'],
-                    value=row['value'],
-                    metadata=row['metadata'] or {},
-                    source=row['source'],
-                    confidence=row['confidence'],
-                    importance=row['importance'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at'],
-                    access_count=row['access_count'],
-                    is_active=row['is_active']
-                )
+        rows = await conn.fetch("""
+            SELECT * FROM user_memory WHERE is_active = TRUE
+        """)
+        for row in rows:
+            key = f"{row['category']}:{row['key']}"
+            self._cache[key] = Memory(
+                id=row['id'],
+                category=row['category'],
+                subcategory=row['subcategory'],
+                key=row['key'],
+                value=row['value'],
+                metadata=row['metadata'] or {},
+                source=row['source'],
+                confidence=row['confidence'],
+                importance=row['importance'],
+                created_at=row['created_at'],
+                updated_at=row['updated_at'],
+                access_count=row['access_count'],
+                is_active=row['is_active']
+            )
 
     async def add(
         self,
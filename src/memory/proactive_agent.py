@@ -315,14 +315,15 @@ class ProactiveAgent:
 
         # Add system metrics
         try:
-            from tools.system import get_disk_percent, get_memory_percent, get_cpu_percent
-            from tools.gpu import get_gpu_temperature, get_gpu_utilization
+            from tools.system import MetricsSnapshot
+            from tools.gpu import get_gpu_utilization
 
+            metrics = await MetricsSnapshot.current()
             context["system_metrics"] = {
-                "cpu_percent": await get_cpu_percent(),
-                "memory_percent": await get_memory_percent(),
-                "disk_percent": await get_disk_percent(),
-                "gpu_temp": await get_gpu_temperature(),
+                "cpu_percent": metrics.cpu_percent,
+                "memory_percent": metrics.memory_percent,
+                "disk_percent": metrics.disk_percent,
+                "gpu_temp": metrics.gpu_temp,
                 "gpu_util": await get_gpu_utilization()
             }
         except Exception as e:
@@ -68,7 +68,18 @@ class ServerLogger:
             return False
 
         try:
-            await self._create_tables()
+            async with self.pool.acquire() as conn:
+                return await self.initialize_with_conn(pool, conn)
+        except Exception as e:
+            logger.error(f"Failed to initialize ServerLogger: {e}")
+            return False
+
+    async def initialize_with_conn(self, pool, conn) -> bool:
+        """Initialize on an already acquired connection (e.g. the startup transaction)"""
+        self.pool = pool
+        try:
+            async with conn.transaction():
+                await self._create_tables(conn)
             self._initialized = True
             # Start buffer flush task
             self._buffer_flush_task = asyncio.create_task(self._flush_loop())
@@ -78,28 +89,27 @@ class ServerLogger:
             logger.error(f"Failed to initialize ServerLogger: {e}")
             return False
 
-    async def _create_tables(self):
+    async def _create_tables(self, conn):
         """Create server log tables"""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS server_logs (
-                    id SERIAL PRIMARY KEY,
-                    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    event_type VARCHAR(50) NOT NULL,
-                    event_subtype VARCHAR(100),
-                    description TEXT,
-                    details JSONB DEFAULT '{}',
-                    importance VARCHAR(20) DEFAULT 'info',
-                    source VARCHAR(50) DEFAULT 'system',
-                    related_service VARCHAR(100),
-                    duration_seconds INTEGER,
-                    is_processed BOOLEAN DEFAULT FALSE
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON server_logs(timestamp DESC);
-                CREATE INDEX IF NOT EXISTS idx_logs_event_type ON server_logs(event_type);
-                CREATE INDEX IF NOT EXISTS idx_logs_importance ON server_logs(importance);
-            """)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS server_logs (
+                id SERIAL PRIMARY KEY,
+                timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                event_type VARCHAR(50) NOT NULL,
+                event_subtype VARCHAR(100),
+                description TEXT,
+                details JSONB DEFAULT '{}',
+                importance VARCHAR(20) DEFAULT 'info',
+                source VARCHAR(50) DEFAULT 'system',
+                related_service VARCHAR(100),
+                duration_seconds INTEGER,
+                is_processed BOOLEAN DEFAULT FALSE
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON server_logs(timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_logs_event_type ON server_logs(event_type);
+            CREATE INDEX IF NOT EXISTS idx_logs_importance ON server_logs(importance);
+        """)
 
     async def _flush_loop(self):
         """Background task to flush event buffer"""
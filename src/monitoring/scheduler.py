@@ -6,6 +6,7 @@ Provides periodic reports and automated tasks via asyncio scheduling.
 
 import asyncio
 import logging
+import time
 from datetime import datetime, time as dt_time
 from typing import Callable, Optional, Any
 from dataclasses import dataclass, field
@@ -17,6 +18,9 @@ from config import config
 
 logger = logging.getLogger(__name__)
 
+# How long a rendered /schedule listing is reused (seconds)
+STATUS_CACHE_TTL = 2.0
+
 
 class ScheduleType(Enum):
     """Types of schedules"""
@@ -95,6 +99,8 @@ class TaskScheduler:
         self.running = False
         self.task: Optional[asyncio.Task] = None
         self.scheduled_tasks: dict[str, ScheduledTask] = {}
+        # (rendered_at, text) for get_tasks_status; cleared on any task change
+        self._status_cache: Optional[tuple[float, str]] = None
 
         # Register default tasks
         self._register_default_tasks()
@@ -126,6 +132,22 @@ class TaskScheduler:
             day_of_week=6  # Sunday
         )
 
+        # Roll time-partitioned DB tables forward shortly after midnight
+        # (no underscore: task names are rendered as Markdown by /schedule)
+        self.scheduled_tasks["partitions"] = ScheduledTask(
+            name="partitions",
+            schedule_type=ScheduleType.DAILY,
+            callback=self._ensure_db_partitions,
+            enabled=True,
+            run_time=dt_time(0, 5)
+        )
+
+    async def _ensure_db_partitions(self) -> None:
+        """Make sure upcoming monthly partitions exist"""
+        from db import db
+
+        await db.ensure_partitions()
+
     async def _send_daily_report(self) -> None:
         """Send daily system report to admins"""
         if not self.bot or not config.admin_users:
@@ -208,12 +230,14 @@ class TaskScheduler:
     def add_task(self, task: ScheduledTask) -> None:
         """Add a scheduled task"""
         self.scheduled_tasks[task.name] = task
+        self._status_cache = None
         logger.info(f"Scheduled task added: {task.name}")
 
     def remove_task(self, name: str) -> bool:
         """Remove a scheduled task"""
         if name in self.scheduled_tasks:
             del self.scheduled_tasks[name]
+            self._status_cache = None
             logger.info(f"Scheduled task removed: {name}")
             return True
         return False
@@ -222,6 +246,7 @@ class TaskScheduler:
         """Enable a scheduled task"""
         if name in self.scheduled_tasks:
             self.scheduled_tasks[name].enabled = True
+            self._status_cache = None
             logger.info(f"Scheduled task enabled: {name}")
             return True
         return False
@@ -230,6 +255,7 @@ class TaskScheduler:
         """Disable a scheduled task"""
         if name in self.scheduled_tasks:
             self.scheduled_tasks[name].enabled = False
+            self._status_cache = None
             logger.info(f"Scheduled task disabled: {name}")
             return True
         return False
@@ -243,6 +269,7 @@ class TaskScheduler:
         try:
             await task.callback()
             task.last_run = datetime.now()
+            self._status_cache = None
             return True
         except Exception as e:
             logger.error(f"Error running task {name}: {e}")
@@ -250,6 +277,10 @@ class TaskScheduler:
 
     def get_tasks_status(self) -> str:
         """Get status of all scheduled tasks"""
+        now = time.monotonic()
+        if self._status_cache and now - self._status_cache[0] < STATUS_CACHE_TTL:
+            return self._status_cache[1]
+
         lines = [
             "⏰ SCHEDULED TASKS",
             "=" * 30,
@@ -279,7 +310,9 @@ class TaskScheduler:
             lines.append(f"   Last run: {last_run}")
             lines.append("")
 
-        return "\n".join(lines)
+        text = "\n".join(lines)
+        self._status_cache = (now, text)
+        return text
 
     async def scheduler_loop(self) -> None:
         """Main scheduler loop - checks every minute"""
@@ -293,6 +326,7 @@ class TaskScheduler:
                         try:
                             await task.callback()
                             task.last_run = datetime.now()
+                            self._status_cache = None
                         except Exception as e:
                             logger.error(f"Scheduled task {name} failed: {e}")
 
@@ -16,8 +16,8 @@ from enum import Enum
 from telegram import Bot
 
 from config import config, MANAGED_SERVICES
-from tools.gpu import get_gpu_temperature, get_gpu_utilization, get_gpu_memory_free
-from tools.system import get_disk_percent, get_memory_percent, get_cpu_percent
+from tools.gpu import get_gpu_utilization, get_gpu_memory_free
+from tools.system import MetricsSnapshot
 from tools.services import get_service_status
 from utils.message_coordinator import message_coordinator, MessagePriority
 
@@ -103,16 +103,17 @@ class SmartAlerter:
         }
 
         try:
-            snapshot["gpu"]["temp"] = await get_gpu_temperature()
-            snapshot["gpu"]["util"] = await get_gpu_utilization()
-            snapshot["gpu"]["memory_free"] = await get_gpu_memory_free()
+            metrics = await MetricsSnapshot.current()
+            snapshot["gpu"]["temp"] = metrics.gpu_temp
+            snapshot["system"]["disk_percent"] = metrics.disk_percent
+            snapshot["system"]["memory_percent"] = metrics.memory_percent
+            snapshot["system"]["cpu_percent"] = metrics.cpu_percent
         except:
             pass
 
         try:
-            snapshot["system"]["disk_percent"] = await get_disk_percent()
-            snapshot["system"]["memory_percent"] = await get_memory_percent()
-            snapshot["system"]["cpu_percent"] = await get_cpu_percent()
+            snapshot["gpu"]["util"] = await get_gpu_utilization()
+            snapshot["gpu"]["memory_free"] = await get_gpu_memory_free()
         except:
             pass
 
@@ -112,6 +112,44 @@ def is_user_admin(user_id: int) -> bool:
     return user_id in config.admin_users
 
 
+async def check_auth(update: Update, user_id: int) -> bool:
+    """
+    Check whitelist and rate limit for a user.
+    Replies with the reason and returns False when the request is refused.
+    """
+    # Check if user is in whitelist
+    if not is_user_allowed(user_id):
+        await update.message.reply_text(
+            "Access denied. This bot is private and requires authorization."
+        )
+        return False
+
+    # Check rate limit
+    if not rate_limiter.is_allowed(user_id):
+        remaining = rate_limiter.get_remaining(user_id)
+        await update.message.reply_text(
+            f"Rate limit exceeded. Please wait a moment.\n"
+            f"Remaining: {remaining}/{config.rate_limit}"
+        )
+        return False
+
+    return True
+
+
+async def check_admin(update: Update, user_id: int) -> bool:
+    """
+    Check admin privileges for a user.
+    Replies and returns False when the user is not an admin.
+    """
+    if not is_user_admin(user_id):
+        await update.message.reply_text(
+            "This command requires admin privileges."
+        )
+        return False
+
+    return True
+
+
 def require_auth(func: Callable) -> Callable:
     """
     Decorator to require user authentication.
@@ -124,22 +162,7 @@ def require_auth(func: Callable) -> Callable:
         if not user:
             return
 
-        user_id = user.id
-
-        # Check if user is in whitelist
-        if not is_user_allowed(user_id):
-            await update.message.reply_text(
-                "Access denied. This bot is private and requires authorization."
-            )
-            return
-
-        # Check rate limit
-        if not rate_limiter.is_allowed(user_id):
-            remaining = rate_limiter.get_remaining(user_id)
-            await update.message.reply_text(
-                f"Rate limit exceeded. Please wait a moment.\n"
-                f"Remaining: {remaining}/{config.rate_limit}"
-            )
+        if not await check_auth(update, user.id):
             return
 
         return await func(update, context, *args, **kwargs)
@@ -159,10 +182,7 @@ def require_admin(func: Callable) -> Callable:
         if not user:
             return
 
-        if not is_user_admin(user.id):
-            await update.message.reply_text(
-                "This command requires admin privileges."
-            )
+        if not await check_admin(update, user.id):
             return
 
         return await func(update, context, *args, **kwargs)
@@ -17,7 +17,8 @@ from .system import (
     get_ollama_models,
     get_disk_percent,
     get_memory_percent,
-    get_cpu_percent
+    get_cpu_percent,
+    MetricsSnapshot
 )
 
 from .gpu import (
@@ -66,7 +67,7 @@ __all__ = [
     "get_gpu_info", "get_disk_usage", "get_memory_usage", "get_cpu_usage",
     "get_uptime", "get_network_info", "get_processes", "get_full_status",
     "get_conda_envs", "get_ollama_models", "get_disk_percent",
-    "get_memory_percent", "get_cpu_percent",
+    "get_memory_percent", "get_cpu_percent", "MetricsSnapshot",
     # GPU
     "is_gpu_available", "get_gpu_memory_free", "get_gpu_utilization",
     "get_gpu_temperature", "get_gpu_memory_percent", "get_gpu_processes",
@@ -4,6 +4,8 @@ Docker Management Tools
 Provides functions to interact with Docker containers.
 """
 
+from typing import Optional
+
 from utils.shell import run_command
 
 
@@ -26,9 +28,15 @@ async def get_container_stats() -> str:
     return f"CONTAINER RESOURCE USAGE\n{'='*40}\n{output}"
 
 
-async def get_container_logs(container: str, lines: int = 50) -> str:
-    """Get logs from a container"""
-    output, code = await run_command(f"docker logs --tail {lines} {container} 2>&1")
+async def get_container_logs(
+    container: str,
+    lines: int = 50,
+    max_bytes: Optional[int] = None
+) -> str:
+    """Get logs from a container, optionally capped to the last max_bytes"""
+    output, code = await run_command(
+        f"docker logs --tail {lines} {container} 2>&1", max_bytes=max_bytes
+    )
 
     if code != 0:
         return f"Error: Container '{container}' not found or not running"
@@ -62,6 +62,22 @@ async def capture_screenshot() -> Optional[bytes]:
         return None
 
 
+def preload_chart_libs() -> bool:
+    """
+    Import matplotlib (Agg backend) and numpy ahead of the first chart.
+    Blocking; run it in an executor. Returns False if they're unavailable.
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')  # Non-interactive backend
+        import matplotlib.pyplot  # noqa: F401
+        import numpy  # noqa: F401
+        return True
+    except ImportError as e:
+        logger.warning(f"Chart libraries unavailable: {e}")
+        return False
+
+
 async def generate_gpu_chart() -> Optional[bytes]:
     """
     Generate a GPU metrics chart using matplotlib.
@@ -5,9 +5,12 @@ Provides functions to get system status, GPU, disk, memory, CPU info.
 """
 
 import asyncio
-from typing import Optional
+import time
+from dataclasses import dataclass
+from typing import ClassVar, Optional
 
 from utils.shell import run_command
+from tools.gpu import get_gpu_temperature
 
 
 async def get_gpu_info(detail: str = "summary") -> str:
@@ -220,3 +223,46 @@ async def get_cpu_percent() -> int:
         return int(float(output.strip()))
     except (ValueError, AttributeError):
         return -1
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """
+    The four alerting metrics, probed together and shared for a short window.
+
+    Concurrent callers within the TTL reuse one set of nvidia-smi/df/free/top
+    runs instead of each forking their own.
+    """
+    gpu_temp: int
+    disk_percent: int
+    memory_percent: int
+    cpu_percent: int
+    taken_at: float
+
+    _latest: ClassVar[Optional["MetricsSnapshot"]] = None
+    _lock: ClassVar[Optional[asyncio.Lock]] = None
+
+    @classmethod
+    async def current(cls, ttl: float = 1.0) -> "MetricsSnapshot":
+        """Return a snapshot no older than ttl seconds, probing if needed"""
+        snap = cls._latest
+        if snap and time.monotonic() - snap.taken_at < ttl:
+            return snap
+
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            # Another caller may have refreshed it while we waited
+            snap = cls._latest
+            if snap and time.monotonic() - snap.taken_at < ttl:
+                return snap
+
+            gpu_temp, disk_pct, mem_pct, cpu_pct = await asyncio.gather(
+                get_gpu_temperature(),
+                get_disk_percent(),
+                get_memory_percent(),
+                get_cpu_percent(),
+            )
+            snap = cls(gpu_temp, disk_pct, mem_pct, cpu_pct, time.monotonic())
+            cls._latest = snap
+            return snap
@@ -0,0 +1,75 @@
+"""
+Outbound Rate Limiting
+
+AIORateLimiter only paces group chats per chat. Telegram also asks bots to
+keep private chats to about one message per second, so this subclass adds
+a per-chat bucket for those.
+"""
+
+from typing import Any, Callable, Coroutine, Optional, Union
+
+from aiolimiter import AsyncLimiter
+from telegram.ext import AIORateLimiter
+
+# Drop idle private-chat limiters once this many accumulate
+MAX_PRIVATE_LIMITERS = 512
+
+
+class ChatRateLimiter(AIORateLimiter):
+    """AIORateLimiter that also paces each private chat"""
+
+    def __init__(
+        self,
+        private_max_rate: float = 3,
+        private_time_period: float = 3,
+        **kwargs: Any
+    ):
+        """
+        Args:
+            private_max_rate: Burst size for a single private chat
+            private_time_period: Seconds over which private_max_rate refills
+            **kwargs: Passed through to AIORateLimiter
+        """
+        super().__init__(**kwargs)
+        self._private_max_rate = private_max_rate
+        self._private_time_period = private_time_period
+        self._private_limiters: dict[int, AsyncLimiter] = {}
+
+    def _get_private_limiter(self, chat_id: int) -> AsyncLimiter:
+        """Get or create the bucket for a private chat"""
+        limiter = self._private_limiters.get(chat_id)
+        if limiter is not None:
+            return limiter
+
+        if len(self._private_limiters) >= MAX_PRIVATE_LIMITERS:
+            # Limiters back at full capacity carry no state worth keeping
+            for key, idle in list(self._private_limiters.items()):
+                if idle.has_capacity(idle.max_rate):
+                    del self._private_limiters[key]
+
+        limiter = AsyncLimiter(self._private_max_rate, self._private_time_period)
+        self._private_limiters[chat_id] = limiter
+        return limiter
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, dict, list, None]]],
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Union[bool, dict, list, None]:
+        chat_id = data.get("chat_id")
+
+        # Positive ids are users; groups and channels are negative and
+        # already handled by the parent's group limiter
+        if isinstance(chat_id, int) and chat_id > 0:
+            async with self._get_private_limiter(chat_id):
+                return await super().process_request(
+                    callback, args, kwargs, endpoint, data, rate_limit_args
+                )
+
+        return await super().process_request(
+            callback, args, kwargs, endpoint, data, rate_limit_args
+        )
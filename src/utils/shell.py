@@ -5,15 +5,25 @@ Common shell command execution functions used across the bot.
 """
 
 import asyncio
+from typing import Optional
 
+# Read size when tailing command output with max_bytes
+TAIL_CHUNK_SIZE = 65536
 
-async def run_command(cmd: str, timeout: int = 30) -> tuple[str, int]:
+
+async def run_command(
+    cmd: str,
+    timeout: int = 30,
+    max_bytes: Optional[int] = None
+) -> tuple[str, int]:
     """
     Run a shell command and return (output, return_code)
 
     Args:
         cmd: Shell command to execute
         timeout: Maximum seconds to wait
+        max_bytes: Keep only the last max_bytes of output, prefixed with
+            "...(truncated)" when anything was dropped
 
     Returns:
         Tuple of (stdout_output, return_code)
@@ -25,14 +35,43 @@ async def run_command(cmd: str, timeout: int = 30) -> tuple[str, int]:
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.STDOUT
         )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
-        return stdout.decode('utf-8').strip(), proc.returncode
+        if max_bytes is None:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            return stdout.decode('utf-8').strip(), proc.returncode
+
+        try:
+            output = await asyncio.wait_for(_read_tail(proc, max_bytes), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise
+        return output, proc.returncode
     except asyncio.TimeoutError:
         return "Command timed out", -1
     except Exception as e:
         return f"Error: {str(e)}", -1
 
 
+async def _read_tail(proc: asyncio.subprocess.Process, max_bytes: int) -> str:
+    """Drain proc's stdout keeping only the trailing max_bytes"""
+    tail = bytearray()
+    truncated = False
+    while chunk := await proc.stdout.read(TAIL_CHUNK_SIZE):
+        tail += chunk
+        if len(tail) > max_bytes:
+            del tail[:-max_bytes]
+            truncated = True
+    await proc.wait()
+
+    if not truncated:
+        return tail.decode('utf-8').strip()
+
+    # Don't start in the middle of a multi-byte character
+    start = 0
+    while start < len(tail) and tail[start] & 0xC0 == 0x80:
+        start += 1
+    return "...(truncated)\n" + tail[start:].decode('utf-8').strip()
+
+
 async def run_command_separate_stderr(cmd: str, timeout: int = 30) -> tuple[str, str, int]:
     """
     Run command with separate stdout and stderr